@@ -0,0 +1,355 @@
+# Local HTTP stand-in for the API endpoints spec'd in script_3.py
+#
+# A stdlib server (no Django) over the same pieces the real service would use:
+# the data file built by tasks.py (customers, loans, feature table),
+# credit_scoring for eligibility and loan_service.LoanService for creation.
+# It exists so load_test.py has something realistic to measure until the
+# Django app lands; request and response fields follow script_3.py.
+#
+#   POST /register             {first_name, last_name, age, monthly_income, phone_number}
+#   POST /check-eligibility    {customer_id, loan_amount, interest_rate, tenure}
+#   POST /create-loan          same body; optional Idempotency-Key header
+#   GET  /view-loan/<loan_id>
+#   GET  /view-loans/<customer_id>     from the shared loan book with --loan-book
+#                                       (plus loans created since it was published)
+#   GET  /explain-score/<customer_id>   score components, override and
+#                                       rejection reason (from the score cache);
+#        ?loan_amount=&interest_rate=&tenure=  explains the decision for that
+#                                       loan, EMI-cap and limit rejections included
+#   GET  /monitor                       monitoring.DecisionMonitor snapshot of the
+#                                       eligibility checks and loans decided so far
+#
+# Usage: python api_server.py --db credit.db [--port 8000] [--as-of 2025-07-21]
+#                             [--monitor-snapshot snapshots/api.json] [--loan-book loan_book]
+import argparse
+import json
+import threading
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+from clock import FixedClock, SystemClock
+from credit_scoring import eligibility_decision, explain, score_breakdown
+from feature_table import EMPTY_FEATURES, FeatureTable
+from jobs import SQLiteBroker, run_workers, submit
+from loan_book import LoanBook, current_generation
+from loan_service import LoanService, ServiceUnavailable
+from monitoring import DecisionMonitor
+from score_cache import ScoreCache, score_key
+from tasks import DEFAULT_CHUNKSIZE, connect, ingest, publish_book
+
+
+class BadRequest(Exception):
+    pass
+
+
+def approved_limit_for(monthly_income):
+    """
+    36 x monthly salary, rounded to the nearest lakh
+    """
+    return round(36 * monthly_income / 100_000) * 100_000
+
+
+def _fields(body, names, kinds):
+    try:
+        return [kind(body[name]) for name, kind in zip(names, kinds)]
+    except (KeyError, TypeError, ValueError) as exc:
+        raise BadRequest(f'Invalid request: {exc}') from exc
+
+
+def _require(condition, message):
+    if not condition:
+        raise BadRequest(f'Invalid request: {message}')
+
+
+class CreditApi:
+    """
+    Endpoint logic, independent of the HTTP plumbing
+    """
+
+    def __init__(self, db_path, clock=None, monitor=None, loan_book=None):
+        self.db_path = db_path
+        self.clock = clock or SystemClock()
+        self.monitor = monitor or DecisionMonitor()
+        self.loan_book = loan_book  # loan_book.LoanBook; None reads loans from SQLite
+        self.local = threading.local()  # one read connection per server thread
+        self.register_lock = threading.Lock()
+
+        conn = self._conn()
+        self.customers = {
+            customer_id: {'Customer ID': customer_id, 'First Name': first_name,
+                          'Last Name': last_name, 'Age': age, 'Phone Number': phone_number,
+                          'Monthly Salary': monthly_salary, 'Approved Limit': approved_limit}
+            for customer_id, first_name, last_name, age, phone_number, monthly_salary, approved_limit
+            in conn.execute('SELECT * FROM customers')
+        }
+        self.service = LoanService(FeatureTable(db_path), self.customers, clock=self.clock,
+                                   monitor=self.monitor)
+        self.scores = ScoreCache()
+
+    def _conn(self):
+        if getattr(self.local, 'conn', None) is None:
+            self.local.conn = connect(self.db_path)
+        return self.local.conn
+
+    def register(self, body):
+        first_name, last_name, age, monthly_income, phone_number = _fields(
+            body, ['first_name', 'last_name', 'age', 'monthly_income', 'phone_number'],
+            [str, str, int, int, int])
+        _require(monthly_income > 0, 'monthly_income must be positive')
+        approved_limit = approved_limit_for(monthly_income)
+        conn = self._conn()
+        with self.register_lock, conn:
+            customer_id = conn.execute(
+                'INSERT INTO customers (first_name, last_name, age, phone_number,'
+                ' monthly_salary, approved_limit) VALUES (?, ?, ?, ?, ?, ?)',
+                (first_name, last_name, age, phone_number, monthly_income, approved_limit)
+            ).lastrowid
+        self.customers[customer_id] = {
+            'Customer ID': customer_id, 'First Name': first_name, 'Last Name': last_name,
+            'Age': age, 'Phone Number': phone_number,
+            'Monthly Salary': monthly_income, 'Approved Limit': approved_limit,
+        }
+        return 201, {'customer_id': customer_id, 'name': f'{first_name} {last_name}',
+                     'age': age, 'monthly_income': monthly_income,
+                     'approved_limit': approved_limit, 'phone_number': phone_number}
+
+    def _loan_request(self, body):
+        customer_id, loan_amount, interest_rate, tenure = _fields(
+            body, ['customer_id', 'loan_amount', 'interest_rate', 'tenure'],
+            [int, float, float, int])
+        _require(loan_amount > 0, 'loan_amount must be positive')
+        _require(interest_rate >= 0, 'interest_rate must not be negative')
+        _require(tenure > 0, 'tenure must be positive')
+        return customer_id, loan_amount, interest_rate, tenure
+
+    def _breakdown(self, customer_id, customer):
+        """
+        (ScoreBreakdown, features) for the customer's current state, cached
+        so /explain-score after /check-eligibility does no scoring
+        """
+        features = self.service.features.get(customer_id, EMPTY_FEATURES)
+        approved_limit = customer['Approved Limit']
+        key = score_key(customer_id, features, approved_limit, self.clock.today())
+        return self.scores.get_or_compute(
+            key, lambda: score_breakdown(features, approved_limit)), features
+
+    def _decide(self, customer_id, customer, loan_amount, interest_rate, tenure,
+                on_decision=None):
+        """
+        (ScoreBreakdown, eligibility result) for one loan request
+        """
+        breakdown, features = self._breakdown(customer_id, customer)
+        return breakdown, eligibility_decision(
+            customer_id, customer, breakdown.credit_score, loan_amount, interest_rate, tenure,
+            features['active_emi_sum'], on_decision, features['active_debt'])
+
+    def check_eligibility(self, body):
+        customer_id, loan_amount, interest_rate, tenure = self._loan_request(body)
+        customer = self.customers.get(customer_id)
+        if customer is None:
+            return 404, {'error': 'Customer not found'}
+        _, result = self._decide(customer_id, customer, loan_amount, interest_rate, tenure,
+                                 self.monitor.observe)
+        result.pop('message')
+        return 200, result
+
+    def explain_score(self, customer_id, query=None):
+        """
+        The score alone, or with `query` (loan_amount, interest_rate, tenure)
+        the decision for that loan
+        """
+        customer = self.customers.get(customer_id)
+        if customer is None:
+            return 404, {'error': 'Customer not found'}
+        if not query:
+            breakdown, _ = self._breakdown(customer_id, customer)
+            return 200, dict(explain(breakdown), customer_id=customer_id)
+        _, loan_amount, interest_rate, tenure = self._loan_request(
+            dict(query, customer_id=customer_id))
+        breakdown, result = self._decide(customer_id, customer, loan_amount, interest_rate, tenure)
+        return 200, dict(explain(breakdown, result), customer_id=customer_id)
+
+    def monitor_snapshot(self):
+        return 200, self.monitor.snapshot()
+
+    def create_loan(self, body, idempotency_key=None):
+        customer_id, loan_amount, interest_rate, tenure = self._loan_request(body)
+        if customer_id not in self.customers:
+            return 404, {'error': 'Customer not found'}
+        response = self.service.create_loan(customer_id, loan_amount, interest_rate, tenure,
+                                            idempotency_key=idempotency_key)
+        return (201 if response['loan_approved'] else 200), response
+
+    def view_loan(self, loan_id):
+        row = self._conn().execute(
+            'SELECT loan_id, customer_id, loan_amount, interest_rate, monthly_payment, tenure'
+            ' FROM loans WHERE loan_id = ? UNION ALL'
+            ' SELECT loan_id, customer_id, loan_amount, interest_rate, monthly_payment, tenure'
+            ' FROM loans_archive WHERE loan_id = ?', (loan_id, loan_id)
+        ).fetchone()
+        if row is None:
+            return 404, {'error': 'Loan not found'}
+        loan_id, customer_id, loan_amount, interest_rate, monthly_payment, tenure = row
+        customer = self.customers.get(customer_id, {})
+        return 200, {
+            'loan_id': loan_id,
+            'customer': {'id': customer_id, 'first_name': customer.get('First Name'),
+                         'last_name': customer.get('Last Name'),
+                         'phone_number': customer.get('Phone Number'), 'age': customer.get('Age')},
+            'loan_amount': loan_amount, 'interest_rate': interest_rate,
+            'monthly_installment': monthly_payment, 'tenure': tenure,
+        }
+
+    def _book_loans(self, customer_id, today):
+        """
+        Current loans from the shared book, then those created since it was published
+        """
+        self.loan_book.refresh()
+        snapshot = self.loan_book.snapshot
+        column = snapshot.column
+        today_ordinal = today.toordinal()
+        rows = [
+            (column('loan_id')[row], column('loan_amount')[row], column('interest_rate')[row],
+             column('monthly_payment')[row],
+             column('tenure')[row] - column('emis_paid_on_time')[row])
+            for row in snapshot.rows_for(customer_id)
+            if column('end_date')[row] > today_ordinal
+        ]
+        return rows + self._conn().execute(
+            'SELECT loan_id, loan_amount, interest_rate, monthly_payment,'
+            ' tenure - emis_paid_on_time FROM loans'
+            ' WHERE customer_id = ? AND loan_id > ? AND end_date > ?',
+            (customer_id, snapshot.last_loan_id, today.isoformat())
+        ).fetchall()
+
+    def view_loans(self, customer_id):
+        if customer_id not in self.customers:
+            return 404, {'error': 'Customer not found'}
+        today = self.clock.today()
+        if self.loan_book is not None:
+            rows = self._book_loans(customer_id, today)
+        else:
+            rows = self._conn().execute(
+                'SELECT loan_id, loan_amount, interest_rate, monthly_payment,'
+                ' tenure - emis_paid_on_time FROM loans WHERE customer_id = ? AND end_date > ?',
+                (customer_id, today.isoformat())
+            ).fetchall()
+        return 200, [
+            {'loan_id': loan_id, 'loan_amount': loan_amount, 'interest_rate': interest_rate,
+             'monthly_installment': monthly_payment, 'repayments_left': repayments_left}
+            for loan_id, loan_amount, interest_rate, monthly_payment, repayments_left in rows
+        ]
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, so clients can reuse connections
+    disable_nagle_algorithm = True  # headers and body go out as separate writes
+    api = None  # set by make_server
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _dispatch(self, handler, *args):
+        try:
+            self._send(*handler(*args))
+        except BadRequest as exc:
+            self._send(400, {'error': str(exc)})
+        except ServiceUnavailable as exc:
+            self._send(503, {'error': str(exc)})
+        except Exception:
+            # Answer instead of dropping the connection; the server keeps running
+            traceback.print_exc()
+            self._send(500, {'error': 'Internal server error'})
+
+    def do_POST(self):
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        except ValueError:
+            return self._send(400, {'error': 'Body must be JSON'})
+        if self.path == '/register':
+            return self._dispatch(self.api.register, body)
+        if self.path == '/check-eligibility':
+            return self._dispatch(self.api.check_eligibility, body)
+        if self.path == '/create-loan':
+            return self._dispatch(self.api.create_loan, body, self.headers.get('Idempotency-Key'))
+        self._send(404, {'error': 'Not found'})
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == '/monitor':
+            return self._dispatch(self.api.monitor_snapshot)
+        parts = url.path.strip('/').split('/')
+        if len(parts) == 2 and parts[1].isdigit():
+            if parts[0] == 'view-loan':
+                return self._dispatch(self.api.view_loan, int(parts[1]))
+            if parts[0] == 'view-loans':
+                return self._dispatch(self.api.view_loans, int(parts[1]))
+            if parts[0] == 'explain-score':
+                return self._dispatch(self.api.explain_score, int(parts[1]),
+                                      dict(parse_qsl(url.query)))
+        self._send(404, {'error': 'Not found'})
+
+    def log_message(self, format, *args):
+        pass  # per-request logging would dominate a load test
+
+
+def make_server(api, host='127.0.0.1', port=8000):
+    handler = type('BoundApiHandler', (ApiHandler,), {'api': api})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def initialize(db_path, as_of, customer_path='customer_data.xlsx', loan_path='loan_data.xlsx',
+               book_dir=None):
+    """
+    Ingest the exports (tasks.py) unless the data file already has customers,
+    and publish the shared loan book to `book_dir` if none is there yet
+    """
+    conn = connect(db_path)
+    conn.execute('PRAGMA journal_mode=WAL')  # readers do not wait for the loan committer
+    empty = conn.execute('SELECT COUNT(*) FROM customers').fetchone()[0] == 0
+    conn.close()
+    broker = SQLiteBroker()
+    if empty:
+        submit(broker, ingest.s(db_path, customer_path, loan_path, as_of,
+                                        DEFAULT_CHUNKSIZE, book_dir))
+    elif book_dir and current_generation(book_dir) is None:
+        submit(broker, publish_book.s(db_path, book_dir))
+    run_workers(broker, 2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Local stand-in for the credit approval API')
+    parser.add_argument('--db', default='credit.db')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--as-of', help='business date (default: today)')
+    parser.add_argument('--monitor-snapshot',
+                        help='write the decision monitor snapshot here on shutdown')
+    parser.add_argument('--loan-book', help='serve /view-loans from the shared loan book here')
+    args = parser.parse_args(argv)
+
+    clock = FixedClock(args.as_of) if args.as_of else SystemClock()
+    initialize(args.db, clock.today().isoformat(), book_dir=args.loan_book)
+    loan_book = LoanBook(args.loan_book) if args.loan_book else None
+    api = CreditApi(args.db, clock, loan_book=loan_book)
+    server = make_server(api, args.host, args.port)
+    print(f"Serving on http://{args.host}:{server.server_port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        api.service.close()
+        if args.monitor_snapshot:
+            api.monitor.write_snapshot(args.monitor_snapshot)
+
+
+if __name__ == '__main__':
+    main()
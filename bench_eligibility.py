@@ -0,0 +1,85 @@
+# Per-request latency of single-customer eligibility: pandas vs scalar path
+#
+# First checks that the scalar engine (credit_scoring.score_loan_records)
+# returns the same score as the DataFrame scorer for every customer in the
+# book at several as-of dates, then times check_loan_eligibility for a
+# typical 2-3 loan history on each path.
+#
+# Usage: python bench_eligibility.py [--repeat 2000]
+import argparse
+import time
+
+import pandas as pd
+
+from credit_scoring import (
+    calculate_credit_score_assignment, check_loan_eligibility, eligibility_decision,
+    loan_records_from_frame, score_loan_records,
+)
+
+AS_OF_DATES = ['2012-06-30', '2019-01-01', '2023-08-30', '2025-07-21']
+
+
+def verify_identical(customer_data, loan_data):
+    """
+    Number of (customer, date) pairs where the two engines disagree
+    """
+    histories = dict(tuple(loan_data.groupby('Customer ID')))
+    mismatches = 0
+    for as_of in AS_OF_DATES:
+        for customer in customer_data.to_dict('records'):
+            history = histories.get(customer['Customer ID'], loan_data.iloc[:0])
+            vectorized = calculate_credit_score_assignment(customer, history, as_of)
+            scalar = score_loan_records(customer, loan_records_from_frame(history), as_of)
+            mismatches += vectorized != scalar
+    return mismatches
+
+
+def time_per_call(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark single-customer eligibility')
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    customer_data = pd.read_excel('customer_data.xlsx')
+    loan_data = pd.read_excel('loan_data.xlsx')
+
+    print("SINGLE-CUSTOMER ELIGIBILITY BENCHMARK")
+    print("=" * 60)
+    checked = len(customer_data) * len(AS_OF_DATES)
+    print(f"Score mismatches (scalar vs pandas): "
+          f"{verify_identical(customer_data, loan_data)} / {checked}")
+
+    customer = customer_data.iloc[1].to_dict()
+    history = loan_data[loan_data['Customer ID'] == customer['Customer ID']]
+    records = loan_records_from_frame(history)
+    request = (500000, 10.5, 60, '2025-07-21')
+    print(f"\nCustomer {customer['Customer ID']} with {len(records)} loans, "
+          f"{args.repeat} calls each:")
+
+    def pandas_path():
+        score = calculate_credit_score_assignment(customer, history, request[3])
+        return eligibility_decision(customer['Customer ID'], customer, score, *request[:3])
+
+    paths = {
+        'pandas (DataFrame scorer)': pandas_path,
+        'auto, DataFrame input': lambda: check_loan_eligibility(
+            customer['Customer ID'], customer, history, *request),
+        'scalar, LoanRecord input': lambda: check_loan_eligibility(
+            customer['Customer ID'], customer, records, *request),
+    }
+    baseline = None
+    for label, function in paths.items():
+        per_call = time_per_call(function, args.repeat)
+        baseline = baseline or per_call
+        print(f"  {label:28s} {per_call * 1e6:9.1f} us/request  "
+              f"({baseline / per_call:5.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
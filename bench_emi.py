@@ -0,0 +1,113 @@
+# EMI via cached annuity factors: precision check and throughput
+#
+# credit_scoring.calculate_emi now multiplies the principal by a memoized
+# annuity factor instead of evaluating (1 + r)^n on every call. This checks
+# that the rounded EMI matches the original closed-form expression for every
+# loan in loan_data.xlsx and for a sweep over a rate/tenure grid, then times
+# both versions. Exits non-zero if any rounded EMI differs (test_emi.py runs
+# the same check under pytest).
+#
+# Usage: python bench_emi.py [--calls 200000]
+import argparse
+import random
+import sys
+import time
+
+import pandas as pd
+
+from credit_scoring import annuity_factor, calculate_emi, warm_annuity_cache
+
+GRID_RATES = [rate / 100 for rate in range(1, 3001)]   # 0.01% .. 30.00%
+GRID_TENURES = range(1, 361)                           # 1 .. 360 months
+
+# A product catalogue small enough to precompute up front
+CATALOGUE_RATES = [rate / 100 for rate in range(500, 2001, 25)]  # 5% .. 20% in 0.25% steps
+CATALOGUE_TENURES = range(6, 361, 6)
+
+
+def reference_emi(principal, annual_rate, tenure_months):
+    """
+    calculate_emi as it was before the annuity-factor cache
+    """
+    if annual_rate == 0:
+        return principal / tenure_months
+    monthly_rate = annual_rate / (12 * 100)
+    emi = principal * (monthly_rate * (1 + monthly_rate)**tenure_months) / \
+          ((1 + monthly_rate)**tenure_months - 1)
+    return round(emi, 2)
+
+
+def compare(cases):
+    """
+    (number of cases whose rounded EMI differs, largest difference)
+    """
+    mismatches = 0
+    worst = 0.0
+    for principal, rate, tenure in cases:
+        difference = abs(calculate_emi(principal, rate, tenure) - reference_emi(principal, rate, tenure))
+        mismatches += difference > 0
+        worst = max(worst, difference)
+    return mismatches, worst
+
+
+def calls_per_second(function, cases, repeat=1):
+    """
+    Best of `repeat` passes over `cases`
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for principal, rate, tenure in cases:
+            function(principal, rate, tenure)
+        best = min(best, time.perf_counter() - start)
+    return len(cases) / best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Precision and throughput of cached EMIs')
+    parser.add_argument('--loans', default='loan_data.xlsx')
+    parser.add_argument('--grid-samples', type=int, default=500_000)
+    parser.add_argument('--calls', type=int, default=200_000)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args(argv)
+
+    loans = pd.read_excel(args.loans)
+    book_cases = list(zip(loans['Loan Amount'].tolist(), loans['Interest Rate'].tolist(),
+                          loans['Tenure'].tolist()))
+    rng = random.Random(args.seed)
+    grid_cases = [
+        (rng.randrange(10_000, 10_000_000), rng.choice(GRID_RATES), rng.choice(GRID_TENURES))
+        for _ in range(args.grid_samples)
+    ]
+
+    print("EMI ANNUITY-FACTOR CACHE")
+    print("=" * 50)
+    total_mismatches = 0
+    for label, cases in (('loan_data.xlsx', book_cases), ('rate/tenure grid', grid_cases)):
+        mismatches, worst = compare(cases)
+        total_mismatches += mismatches
+        print(f"Precision on {label}: {mismatches}/{len(cases)} rounded EMIs differ "
+              f"(max difference {worst:.2f})")
+
+    # Throughput on request-like traffic: the book's own rate/tenure pairs
+    traffic = [rng.choice(book_cases) for _ in range(args.calls)]
+    pairs = {(rate, tenure) for _, rate, tenure in traffic}
+    annuity_factor.cache_clear()
+    cold = calls_per_second(calculate_emi, traffic)
+    warm = calls_per_second(calculate_emi, traffic, repeat=5)
+    reference = calls_per_second(reference_emi, traffic, repeat=5)
+    print(f"Distinct (rate, tenure) pairs in traffic: {len(pairs)}")
+    print(f"Original formula: {reference:,.0f} EMIs/s")
+    print(f"Cached, cold start: {cold:,.0f} EMIs/s")
+    print(f"Cached, warm: {warm:,.0f} EMIs/s ({warm / reference:.1f}x)")
+
+    annuity_factor.cache_clear()
+    start = time.perf_counter()
+    warm_annuity_cache(CATALOGUE_RATES, CATALOGUE_TENURES)
+    print(f"Precomputing a catalogue of {annuity_factor.cache_info().currsize:,} pairs: "
+          f"{(time.perf_counter() - start) * 1000:.1f} ms")
+    return 1 if total_mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,105 @@
+# Per-worker memory: private loan frames vs the shared memory-mapped book
+#
+# Starts N worker processes that each either copy the loan columns into
+# private arrays (what every worker loading its own frames amounts to) or map
+# the shared book (loan_book.py) and touch every page. While all workers hold
+# their data, each reports from /proc/self/smaps_rollup:
+#   RSS     - resident pages, shared ones included
+#   private - pages only this process holds
+#   PSS     - RSS with shared pages divided among their users
+# Summed PSS is the real footprint: it grows with N for private copies and
+# stays flat for the shared book. Linux only.
+#
+# Usage: python bench_loan_book.py [--scale 1000] [--workers 1 2 4 8]
+import argparse
+import multiprocessing
+import tempfile
+
+from loan_book import COLUMNS, LoanBook, publish_loan_book
+
+MB = 1024 * 1024
+
+
+def memory_usage():
+    """
+    (rss, private, pss) in bytes for this process
+    """
+    fields = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1]) * 1024
+    private = fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)
+    return fields['Rss'], private, fields['Pss']
+
+
+def worker(book_dir, mode, barrier, results):
+    import numpy as np
+
+    book = LoanBook(book_dir)
+    before = memory_usage()
+    if mode == 'private':
+        held = [np.array(book.snapshot.array(name), copy=True) for name, _ in COLUMNS]
+        book = None  # unmap: keep only the private copy
+    else:
+        held = [book.snapshot.array(name) for name, _ in COLUMNS]
+    checksum = sum(float(column.sum()) for column in held)  # touch every page
+    barrier.wait()  # measure while every worker holds its data
+    after = memory_usage()
+    results.put(tuple(a - b for a, b in zip(after, before)) + (checksum,))
+    barrier.wait()
+
+
+def measure(book_dir, mode, workers):
+    context = multiprocessing.get_context('spawn')
+    barrier = context.Barrier(workers)
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(book_dir, mode, barrier, results))
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    samples = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    rss, private, pss = (sum(sample[i] for sample in samples) for i in range(3))
+    return rss / workers, private / workers, pss
+
+
+def main(argv=None):
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description='Per-worker memory with a shared loan book')
+    parser.add_argument('--loans', default='loan_data.xlsx')
+    parser.add_argument('--scale', type=int, default=1000,
+                        help='replicate the loan book this many times')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args(argv)
+
+    loans = pd.read_excel(args.loans)
+    customer_span = int(loans['Customer ID'].max()) + 1
+    loan_span = int(loans['Loan ID'].max()) + 1
+    scaled = pd.concat([
+        loans.assign(**{'Customer ID': loans['Customer ID'] + copy * customer_span,
+                        'Loan ID': loans['Loan ID'] + copy * loan_span})
+        for copy in range(args.scale)
+    ], ignore_index=True)
+
+    with tempfile.TemporaryDirectory() as book_dir:
+        publish_loan_book(scaled, book_dir)
+        snapshot = LoanBook(book_dir).snapshot
+        book_size = sum(snapshot.array(name).nbytes for name, _ in COLUMNS)
+
+        print("SHARED LOAN BOOK: MEMORY PER WORKER")
+        print("=" * 50)
+        print(f"Loans: {len(scaled):,} ({book_size / MB:.1f} MB of columns)")
+        print(f"{'mode':<8} {'workers':>7} {'RSS/worker':>11} {'private/worker':>15} {'total PSS':>10}")
+        for mode in ('private', 'shared'):
+            for workers in args.workers:
+                rss, private, pss = measure(book_dir, mode, workers)
+                print(f"{mode:<8} {workers:>7} {rss / MB:>9.1f}MB {private / MB:>13.1f}MB "
+                      f"{pss / MB:>8.1f}MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+# Start-up cost benchmark based on `python -X importtime`
+#
+# Compares importing the slim runtime (runtime.py -> credit_scoring,
+# feature_table) against the heavy imports every analysis script does at
+# module level. Reports the cumulative import time of each top-level module,
+# whether pandas / numpy / plotly got loaded, and wall-clock start-up.
+#
+# Usage: python bench_startup.py [--runs 5]
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+TARGETS = {
+    'runtime (slim entry point)': 'import runtime',
+    'credit_scoring core': 'import credit_scoring',
+    'pandas + numpy (script.py)': 'import pandas, numpy',
+    'plotly (chart_script.py before)': 'import plotly.graph_objects',
+}
+HEAVY_MODULES = ('pandas', 'numpy', 'plotly')
+
+
+def import_profile(statement):
+    """
+    Run `statement` under -X importtime; return (total_us, set of top-level modules)
+    """
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        capture_output=True, text=True,
+    )
+    if completed.returncode != 0:
+        return None, set()
+
+    total = 0
+    modules = set()
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        name = name[1:]  # drop the separator space; the rest is nesting
+        modules.add(name.strip().split('.')[0])
+        if not name.startswith(' '):  # top-level import of this process
+            total += int(cumulative)
+    return total, modules
+
+
+def wall_clock(statement, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', statement], check=False,
+                       capture_output=True)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark process start-up imports')
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    baseline = wall_clock('pass', args.runs)
+
+    print("STARTUP IMPORT BENCHMARK")
+    print("=" * 70)
+    print(f"Interpreter start-up (python -c pass): {baseline * 1000:.1f} ms\n")
+    for label, statement in TARGETS.items():
+        total, modules = import_profile(statement)
+        if total is None:
+            print(f"{label}: not importable here")
+            continue
+        heavy = [name for name in HEAVY_MODULES if name in modules]
+        elapsed = wall_clock(statement, args.runs)
+        print(f"{label}:")
+        print(f"  Cumulative import time: {total / 1000:.1f} ms")
+        print(f"  Wall clock (median of {args.runs}): {elapsed * 1000:.1f} ms")
+        print(f"  Heavy modules loaded: {', '.join(heavy) or 'none'}")
+        print()
+
+
+if __name__ == '__main__':
+    main()
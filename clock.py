@@ -0,0 +1,39 @@
+# Injectable clock for scoring
+#
+# Scores depend on "today" (current-year activity, which loans are still
+# active). Read the clock once per request or batch and pass the resulting
+# as-of date down, so every score in that batch uses the same date and a
+# score is fully determined by (customer state, as-of date).
+from datetime import date, datetime
+
+
+class SystemClock:
+    """
+    Wall-clock time (production)
+    """
+
+    def today(self):
+        return date.today()
+
+
+class FixedClock:
+    """
+    Pinned date for reproducible batches, tests and backtesting
+    """
+
+    def __init__(self, as_of):
+        self.as_of = to_date(as_of)
+
+    def today(self):
+        return self.as_of
+
+
+def to_date(value):
+    """
+    Normalize a date, datetime, pandas Timestamp or ISO string to a date
+    """
+    if isinstance(value, datetime):  # includes pandas Timestamp
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
@@ -0,0 +1,498 @@
+# Credit scoring and loan eligibility core (0-100 scale, assignment rules)
+#
+# Imported by API/worker processes at startup, so this module must stay free
+# of heavy imports: pandas is only pulled in by the DataFrame-based scorer,
+# on first call. Everything else is plain Python.
+from collections import namedtuple
+from datetime import date, datetime
+from functools import lru_cache
+
+NEW_CUSTOMER_PAYMENT_SCORE = 85
+
+# Distinct (rate, tenure) pairs kept by annuity_factor; rates are quoted to
+# 0.01% and tenures in months, so real traffic needs far fewer
+ANNUITY_CACHE_SIZE = 16384
+
+# Tier tables: (threshold, points) checked in order, then the floor value.
+# Shared by the scalar functions below and the vectorized backtest.
+PAYMENT_TIERS = ((1.0, 100), (0.9, 80), (0.8, 60), (0.7, 40))  # ratio >= threshold
+PAYMENT_FLOOR = 20
+LOAN_COUNT_TIERS = ((2, 100), (4, 80), (6, 60))                 # loans <= threshold
+LOAN_COUNT_FLOOR = 40
+ACTIVITY_TIERS = ((0, 100), (1, 80), (2, 60))                   # loans <= threshold
+ACTIVITY_FLOOR = 40
+VOLUME_TIERS = ((0.3, 100), (0.5, 80), (0.7, 60))               # utilization <= threshold
+VOLUME_FLOOR = 40
+
+# Loan histories up to this size are scored by the pure-Python path even when
+# handed over as a DataFrame
+SCALAR_PATH_MAX_LOANS = 7
+
+# The average payment ratio is rounded to this many places before tiering.
+# Engines add the ratios in different orders (sequential, numpy's pairwise
+# sum, incremental feature-table updates), and the last-bit differences would
+# otherwise straddle tier thresholds, e.g. 0.8999999999999999 vs 0.9.
+PAYMENT_RATIO_DECIMALS = 9
+
+LOAN_RECORD_COLUMNS = ['Loan Amount', 'Tenure', 'EMIs paid on Time', 'Date of Approval', 'End Date']
+
+# One loan for the scalar path; any plain tuple in this field order works too
+LoanRecord = namedtuple(
+    'LoanRecord', ['loan_amount', 'tenure', 'emis_paid_on_time', 'date_of_approval', 'end_date']
+)
+
+
+# Aggregate of a customer's compacted (closed, pre-current-year) loans; see
+# tasks.py compaction. Such loans only count towards loan count and payment
+# history for any later as-of date
+LoanSummary = namedtuple('LoanSummary', ['loan_count', 'payment_ratio_sum', 'loan_volume'])
+
+
+# What a score is made of, produced in the same pass as the score itself.
+# Components are tier points (0-100); `override` is 'limit_exceeded' when
+# active debt above the approved limit forced the score to 0, 'new_customer'
+# when the no-history defaults applied, else None.
+ScoreBreakdown = namedtuple(
+    'ScoreBreakdown', ['credit_score', 'payment', 'loan_count', 'activity', 'volume', 'override']
+)
+
+LIMIT_EXCEEDED_MESSAGE = 'Current loans exceed approved limit'
+LOW_SCORE_MESSAGE = 'Credit score too low (≤10)'
+LIMIT_WOULD_EXCEED_MESSAGE = 'Loan would exceed approved limit'
+
+
+def payment_history_score(avg_payment_ratio):
+    """
+    Component 1: average EMIs-paid-on-time / tenure across all loans (40% weight)
+    """
+    avg_payment_ratio = round(avg_payment_ratio, PAYMENT_RATIO_DECIMALS)
+    for threshold, points in PAYMENT_TIERS:
+        if avg_payment_ratio >= threshold:
+            return points
+    return PAYMENT_FLOOR
+
+
+def loan_count_score(total_loans):
+    """
+    Component 2: number of loans taken in past (20% weight)
+    """
+    for threshold, points in LOAN_COUNT_TIERS:
+        if total_loans <= threshold:
+            return points
+    return LOAN_COUNT_FLOOR
+
+
+def activity_score(current_year_loans):
+    """
+    Component 3: loans approved in the current year (20% weight)
+    """
+    for threshold, points in ACTIVITY_TIERS:
+        if current_year_loans <= threshold:
+            return points
+    return ACTIVITY_FLOOR
+
+
+def volume_score(active_debt, approved_limit):
+    """
+    Component 4: active loan volume against approved limit (20% weight)
+    """
+    if active_debt == 0:
+        return 100
+
+    utilization_ratio = active_debt / approved_limit
+    for threshold, points in VOLUME_TIERS:
+        if utilization_ratio <= threshold:
+            return points
+    return VOLUME_FLOOR
+
+
+def approval_tier(credit_score):
+    """
+    Approval rule bucket for a score (see get_corrected_interest_rate)
+    """
+    if credit_score > 50:
+        return 'approved'
+    elif credit_score > 30:
+        return 'min_rate_12'
+    elif credit_score > 10:
+        return 'min_rate_16'
+    return 'rejected'
+
+
+def score_rejection_reason(credit_score):
+    """
+    Why eligibility_decision rejects on the score alone (None if it does not)
+    """
+    if credit_score == 0:
+        return LIMIT_EXCEEDED_MESSAGE
+    if credit_score <= 10:
+        return LOW_SCORE_MESSAGE
+    return None
+
+
+def explain(breakdown, decision=None):
+    """
+    ScoreBreakdown -> JSON-ready explanation (what support teams look at).
+    Given the eligibility `decision` for a loan request, the rejection reason
+    is whichever rule rejected it (score, EMI cap or approved limit)
+    """
+    rejection_reason = score_rejection_reason(breakdown.credit_score)
+    if decision is not None:
+        rejection_reason = None if decision['approval'] else decision['message']
+    return {
+        'credit_score': breakdown.credit_score,
+        'components': {
+            'payment_history': breakdown.payment,
+            'loan_count': breakdown.loan_count,
+            'current_year_activity': breakdown.activity,
+            'loan_volume': breakdown.volume,
+        },
+        'override': breakdown.override,
+        'approval_tier': approval_tier(breakdown.credit_score),
+        'rejection_reason': rejection_reason,
+    }
+
+
+def _combine(payment, count, activity, volume, limit_exceeded):
+    if limit_exceeded:
+        # Special rule: If current loans > approved limit, credit score = 0
+        return ScoreBreakdown(0, payment, count, activity, volume, 'limit_exceeded')
+    credit_score = round(payment * 0.4 + count * 0.2 + activity * 0.2 + volume * 0.2)
+    return ScoreBreakdown(credit_score, payment, count, activity, volume, None)
+
+
+NEW_CUSTOMER_BREAKDOWN = ScoreBreakdown(
+    round(NEW_CUSTOMER_PAYMENT_SCORE * 0.4 + 100 * 0.2 * 3),
+    NEW_CUSTOMER_PAYMENT_SCORE, 100, 100, 100, 'new_customer'
+)
+
+
+def score_breakdown(features, approved_limit):
+    """
+    ScoreBreakdown as a pure function of one feature-table row.
+
+    `features` is a mapping with loan_count, payment_ratio_sum,
+    current_year_loans and active_debt (see feature_table.FEATURE_COLUMNS).
+    """
+    total_loans = features['loan_count']
+    if total_loans == 0:
+        return NEW_CUSTOMER_BREAKDOWN
+
+    return _combine(
+        payment_history_score(features['payment_ratio_sum'] / total_loans),
+        loan_count_score(total_loans),
+        activity_score(features['current_year_loans']),
+        volume_score(features['active_debt'], approved_limit),
+        features['active_debt'] > approved_limit,
+    )
+
+
+def score_from_features(features, approved_limit):
+    """
+    Credit score as a pure function of one feature-table row
+    """
+    return score_breakdown(features, approved_limit).credit_score
+
+
+def calculate_credit_score_assignment(customer_data, loan_history, as_of):
+    """
+    Credit scoring algorithm matching exact assignment requirements (0-100 scale)
+    `as_of` is the scoring date, read once per request/batch from a clock
+    """
+    return assignment_breakdown(customer_data, loan_history, as_of).credit_score
+
+
+def assignment_breakdown(customer_data, loan_history, as_of):
+    """
+    calculate_credit_score_assignment with its components (ScoreBreakdown)
+    """
+    import pandas as pd
+
+    as_of = pd.Timestamp(as_of)
+
+    # Component 1: Payment History (40% weight as per assignment priority)
+    if len(loan_history) == 0:
+        payment_score = NEW_CUSTOMER_PAYMENT_SCORE  # New customer gets decent score
+    else:
+        # Calculate average payment ratio across all loans
+        payment_ratios = loan_history['EMIs paid on Time'] / loan_history['Tenure']
+        payment_score = payment_history_score(float(payment_ratios.mean()))
+
+    # Component 2: Number of loans taken in past (20% weight)
+    count_score = loan_count_score(len(loan_history))
+
+    # Component 3: Loan activity in current year (20% weight)
+    if len(loan_history) == 0 or 'Date of Approval' not in loan_history.columns:
+        current_activity_score = 100  # New customer
+    else:
+        loan_approval_dates = pd.to_datetime(loan_history['Date of Approval'])
+        current_activity_score = activity_score(
+            int((loan_approval_dates.dt.year == as_of.year).sum())
+        )
+
+    # Component 4: Loan approved volume (20% weight)
+    limit_exceeded = False
+    if len(loan_history) == 0 or 'End Date' not in loan_history.columns:
+        current_volume_score = 100  # New customer
+    else:
+        current_active_loans = loan_history[loan_history['End Date'] > as_of]
+        total_current_debt = current_active_loans['Loan Amount'].sum()
+        approved_limit = customer_data['Approved Limit']
+        limit_exceeded = bool(total_current_debt > approved_limit)
+        current_volume_score = volume_score(total_current_debt, approved_limit)
+
+    if len(loan_history) == 0:
+        return NEW_CUSTOMER_BREAKDOWN
+    return _combine(payment_score, count_score, current_activity_score,
+                    current_volume_score, limit_exceeded)
+
+
+def _as_datetime(value):
+    if isinstance(value, datetime):  # includes pandas Timestamp
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    return datetime.fromisoformat(str(value))
+
+
+def score_loan_records(customer_data, loans, as_of, compacted=None):
+    """
+    Pure-Python calculate_credit_score_assignment over LoanRecord tuples.
+    Same result as the DataFrame scorer at any history length (see
+    PAYMENT_RATIO_DECIMALS), without pandas. `compacted` is the customer's
+    LoanSummary when only hot (uncompacted) loans are passed.
+    """
+    return loan_records_breakdown(customer_data, loans, as_of, compacted).credit_score
+
+
+def loan_records_breakdown(customer_data, loans, as_of, compacted=None):
+    """
+    score_loan_records with its components (ScoreBreakdown)
+    """
+    as_of = _as_datetime(as_of)
+    loan_count = compacted.loan_count if compacted else 0
+    payment_ratio_sum = compacted.payment_ratio_sum if compacted else 0.0
+    current_year_loans = 0
+    active_debt = 0
+
+    for loan_amount, tenure, emis_paid_on_time, date_of_approval, end_date in loans:
+        loan_count += 1
+        payment_ratio_sum += emis_paid_on_time / tenure
+        if _as_datetime(date_of_approval).year == as_of.year:
+            current_year_loans += 1
+        if _as_datetime(end_date) > as_of:
+            active_debt += loan_amount
+
+    return score_breakdown({
+        'loan_count': loan_count,
+        'payment_ratio_sum': payment_ratio_sum,
+        'current_year_loans': current_year_loans,
+        'active_debt': active_debt,
+    }, customer_data['Approved Limit'])
+
+
+def loan_records_from_frame(loan_history):
+    """
+    DataFrame rows -> list of LoanRecord (column-wise, no per-row pandas access)
+    """
+    return [
+        LoanRecord(*row)
+        for row in zip(*(loan_history[column].tolist() for column in LOAN_RECORD_COLUMNS))
+    ]
+
+
+def calculate_credit_score(customer_data, loan_history, as_of):
+    """
+    Credit score for one customer, picking the cheapest engine:
+    record sequences and small DataFrames take the scalar path, larger
+    DataFrames the vectorized calculate_credit_score_assignment
+    """
+    return credit_score_breakdown(customer_data, loan_history, as_of).credit_score
+
+
+def credit_score_breakdown(customer_data, loan_history, as_of):
+    """
+    calculate_credit_score with its components (ScoreBreakdown)
+    """
+    if not hasattr(loan_history, 'columns'):
+        return loan_records_breakdown(customer_data, loan_history, as_of)
+
+    if len(loan_history) == 0:
+        return loan_records_breakdown(customer_data, (), as_of)
+
+    if (len(loan_history) <= SCALAR_PATH_MAX_LOANS
+            and all(column in loan_history.columns for column in LOAN_RECORD_COLUMNS)):
+        return loan_records_breakdown(customer_data, loan_records_from_frame(loan_history), as_of)
+
+    return assignment_breakdown(customer_data, loan_history, as_of)
+
+
+@lru_cache(maxsize=ANNUITY_CACHE_SIZE)
+def annuity_factor(annual_rate, tenure_months):
+    """
+    EMI per unit of principal: r × (1 + r)^n / [(1 + r)^n - 1].
+    Rates and tenures come from a small discrete set, so this is memoized
+    and an EMI is one multiply
+    """
+    if tenure_months <= 0:
+        raise ValueError(f'Tenure must be positive, got {tenure_months}')
+    if annual_rate == 0:
+        return 1 / tenure_months
+
+    monthly_rate = annual_rate / (12 * 100)  # Convert annual % to monthly decimal
+    growth = (1 + monthly_rate)**tenure_months
+    return monthly_rate * growth / (growth - 1)
+
+
+def warm_annuity_cache(rates, tenures):
+    """
+    Precompute factors for a rate/tenure grid (e.g. the product catalogue)
+    """
+    for rate in rates:
+        for tenure in tenures:
+            annuity_factor(rate, tenure)
+
+
+def calculate_emi(principal, annual_rate, tenure_months):
+    """
+    Calculate EMI using compound interest formula
+    EMI = [P × r × (1 + r)^n] / [(1 + r)^n - 1]
+    """
+    if tenure_months <= 0:
+        raise ValueError(f'Tenure must be positive, got {tenure_months}')
+    if annual_rate == 0:
+        return principal / tenure_months
+
+    return round(principal * annuity_factor(annual_rate, tenure_months), 2)
+
+
+def get_corrected_interest_rate(credit_score, requested_rate):
+    """
+    Correct interest rate based on credit score as per assignment rules
+    """
+    if credit_score > 50:
+        return requested_rate  # Approved at requested rate
+    elif 30 < credit_score <= 50:
+        return max(requested_rate, 12.0)  # Minimum 12%
+    elif 10 < credit_score <= 30:
+        return max(requested_rate, 16.0)  # Minimum 16%
+    else:
+        return None  # Loan rejected
+
+
+def validate_emi_to_income(monthly_salary, new_emi, existing_emis=0):
+    """
+    Check if total EMIs exceed 50% of monthly salary
+    """
+    total_emis = new_emi + existing_emis
+    max_allowed = monthly_salary * 0.5
+    ratio = (total_emis / monthly_salary) * 100
+
+    return {
+        'total_emis': total_emis,
+        'max_allowed': max_allowed,
+        'ratio_percentage': round(ratio, 2),
+        'approved': total_emis <= max_allowed
+    }
+
+
+def eligibility_decision(customer_id, customer_data, credit_score,
+                         requested_amount, requested_rate, tenure, existing_emis=0,
+                         on_decision=None, existing_debt=None):
+    """
+    Approval rules applied to an already computed credit score.
+    With `existing_debt` (active loan amounts), a loan that would take the
+    customer past the approved limit is rejected too.
+    `on_decision(credit_score, result, emi_ratio)` is called with every
+    decision (emi_ratio is None when rejected before the EMI check), e.g.
+    monitoring.DecisionMonitor.observe
+    """
+    result, emi_ratio = _eligibility_result(customer_id, customer_data, credit_score,
+                                            requested_amount, requested_rate, tenure,
+                                            existing_emis, existing_debt)
+    if on_decision is not None:
+        on_decision(credit_score, result, emi_ratio)
+    return result
+
+
+def _eligibility_result(customer_id, customer_data, credit_score,
+                        requested_amount, requested_rate, tenure, existing_emis,
+                        existing_debt=None):
+    result = {
+        'customer_id': customer_id,
+        'approval': False,
+        'interest_rate': requested_rate,
+        'corrected_interest_rate': requested_rate,
+        'tenure': tenure,
+        'monthly_installment': 0,
+        'message': ''
+    }
+
+    # Check special rejection conditions
+    rejection_reason = score_rejection_reason(credit_score)
+    if rejection_reason is not None:
+        result['message'] = rejection_reason
+        return result, None
+
+    # Calculate EMI for new loan at the corrected rate
+    corrected_rate = get_corrected_interest_rate(credit_score, requested_rate)
+    result['corrected_interest_rate'] = corrected_rate
+    monthly_emi = calculate_emi(requested_amount, corrected_rate, tenure)
+    result['monthly_installment'] = monthly_emi
+
+    # Check EMI to income ratio
+    emi_validation = validate_emi_to_income(
+        customer_data['Monthly Salary'],
+        monthly_emi,
+        existing_emis
+    )
+    emi_ratio = emi_validation['total_emis'] / customer_data['Monthly Salary']
+
+    if not emi_validation['approved']:
+        result['message'] = f'Total EMIs ({emi_validation["ratio_percentage"]}%) exceed 50% of monthly income'
+        return result, emi_ratio
+
+    # Approved limit must hold after this loan too, not only before it
+    if (existing_debt is not None
+            and existing_debt + requested_amount > customer_data['Approved Limit']):
+        result['message'] = LIMIT_WOULD_EXCEED_MESSAGE
+        return result, emi_ratio
+
+    # If we reach here, loan is approved
+    result['approval'] = True
+    result['message'] = 'Loan approved'
+
+    return result, emi_ratio
+
+
+def check_loan_eligibility(customer_id, customer_data, loan_history,
+                           requested_amount, requested_rate, tenure, as_of,
+                           existing_emis=0, on_decision=None, existing_debt=None):
+    """
+    Complete loan eligibility check as per assignment. `loan_history` is a
+    DataFrame or a sequence of LoanRecord tuples (see calculate_credit_score).
+    The result carries the score's explain() output under 'explanation'
+    """
+    breakdown = credit_score_breakdown(customer_data, loan_history, as_of)
+    result = eligibility_decision(customer_id, customer_data, breakdown.credit_score,
+                                  requested_amount, requested_rate, tenure, existing_emis,
+                                  on_decision, existing_debt)
+    result['explanation'] = explain(breakdown, result)
+    return result
+
+
+def check_eligibility_from_features(customer_id, customer_data, features,
+                                    requested_amount, requested_rate, tenure,
+                                    on_decision=None):
+    """
+    Eligibility from a feature-table row; existing EMIs and debt are the
+    customer's active ones (feature_table active_emi_sum / active_debt).
+    The result carries the score's explain() output under 'explanation'
+    """
+    breakdown = score_breakdown(features, customer_data['Approved Limit'])
+    result = eligibility_decision(customer_id, customer_data, breakdown.credit_score,
+                                  requested_amount, requested_rate, tenure,
+                                  features['active_emi_sum'], on_decision,
+                                  features['active_debt'])
+    result['explanation'] = explain(breakdown, result)
+    return result
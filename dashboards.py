@@ -0,0 +1,199 @@
+# Portfolio dashboards rendered in the background and cached by data version
+#
+# chart_script.py re-renders with plotly on every run, which costs seconds.
+# Here each dashboard is rendered by a background job (jobs.py) from small
+# SQL aggregates, written once per data version as
+# <out_dir>/<name>.<version>.<format>, and served straight from disk until the
+# data it is drawn from changes. Versions come from data_versions counters:
+# scores_version, bumped by tasks.py after every completed re-score, and
+# features_version, bumped whenever customer_features changes (rebuild fan-in,
+# loan_service group commits). A request checks freshness with a two-row
+# lookup; the score dashboards follow the latest re-score and emi_to_income
+# also follows new loans.
+import os
+import sqlite3
+
+from jobs import submit, task
+from tasks import FEATURES_VERSION, SCORES_VERSION, connect, data_version
+
+DASHBOARDS = ['score_distribution', 'approvals_by_tier', 'emi_to_income']
+# data_versions counters each dashboard is drawn from (emi_to_income's title
+# carries the scores as-of date)
+DASHBOARD_SOURCES = {
+    'score_distribution': [SCORES_VERSION],
+    'approvals_by_tier': [SCORES_VERSION],
+    'emi_to_income': [SCORES_VERSION, FEATURES_VERSION],
+}
+FORMATS = ['html', 'png']
+DEFAULT_OUT_DIR = 'artifacts'
+
+
+def dashboard_aggregates(db_path):
+    """
+    Everything the dashboards plot, as small JSON-serializable tables
+    """
+    conn = connect(db_path)
+    try:
+        score_buckets = dict(conn.execute(
+            'SELECT MIN(credit_score / 10, 9) * 10, COUNT(*) FROM scores GROUP BY 1'
+        ).fetchall())
+        tiers = dict(conn.execute(
+            'SELECT approval_tier, COUNT(*) FROM scores GROUP BY 1'
+        ).fetchall())
+        # Active EMIs as a share of salary, 10% buckets, 100%+ folded into the last
+        emi_buckets = dict(conn.execute(
+            'SELECT MIN(CAST(COALESCE(f.active_emi_sum, 0) * 10 / c.monthly_salary AS INTEGER), 10) * 10,'
+            ' COUNT(*) FROM customers c LEFT JOIN customer_features f USING (customer_id)'
+            ' GROUP BY 1'
+        ).fetchall())
+        as_of = conn.execute('SELECT MAX(as_of) FROM scores').fetchone()[0]
+    finally:
+        conn.close()
+
+    return {
+        'as_of': as_of,
+        'score_distribution': {f'{low}-{low + 9 if low < 90 else 100}': score_buckets.get(low, 0)
+                               for low in range(0, 100, 10)},
+        'approvals_by_tier': {tier: tiers.get(tier, 0)
+                              for tier in ['approved', 'min_rate_12', 'min_rate_16', 'rejected']},
+        'emi_to_income': {(f'{low}-{low + 10}%' if low < 100 else '100%+'): emi_buckets.get(low, 0)
+                          for low in range(0, 110, 10)},
+    }
+
+
+def dashboard_versions(conn):
+    """
+    name -> version, e.g. '3' or '3-41' (no dots, it is part of the file name)
+    """
+    counters = {key: data_version(conn, key) for key in (SCORES_VERSION, FEATURES_VERSION)}
+    return {name: '-'.join(str(counters[key]) for key in keys)
+            for name, keys in DASHBOARD_SOURCES.items()}
+
+
+def build_figure(name, aggregates):
+    import plotly.graph_objects as go
+
+    table = aggregates[name]
+    titles = {
+        'score_distribution': 'Credit Score Distribution',
+        'approvals_by_tier': 'Approvals by Tier',
+        'emi_to_income': 'Active EMI to Income',
+    }
+    fig = go.Figure(data=[go.Bar(x=list(table), y=list(table.values()), marker_color='#1FB8CD')])
+    fig.update_layout(title=f"{titles[name]} (as of {aggregates['as_of']})",
+                      yaxis_title='Customers')
+    return fig
+
+
+def artifact_path(out_dir, name, version, fmt):
+    return os.path.join(out_dir, f'{name}.{version}.{fmt}')
+
+
+@task('render_dashboards', max_retries=1)
+def render_dashboards(ctx, db_path, out_dir=DEFAULT_OUT_DIR, formats=FORMATS):
+    """
+    Render every dashboard missing for its current data version, then drop
+    artifacts of older versions
+    """
+    conn = connect(db_path)
+    versions = dashboard_versions(conn)
+    conn.close()
+    aggregates = dashboard_aggregates(db_path)
+    os.makedirs(out_dir, exist_ok=True)
+
+    rendered, errors = [], {}
+    steps = [(name, fmt) for name in DASHBOARDS for fmt in formats]
+    for number, (name, fmt) in enumerate(steps, start=1):
+        path = artifact_path(out_dir, name, versions[name], fmt)
+        if not os.path.exists(path):
+            fig = build_figure(name, aggregates)
+            tmp_path = f'{path}.tmp'
+            try:
+                if fmt == 'html':
+                    fig.write_html(tmp_path, include_plotlyjs='cdn')
+                else:
+                    fig.write_image(tmp_path, format=fmt)
+            except (ValueError, RuntimeError, ImportError) as exc:  # e.g. kaleido missing
+                errors[f'{name}.{fmt}'] = str(exc)
+            else:
+                os.replace(tmp_path, path)  # readers never see a half-written file
+                rendered.append(path)
+        ctx.progress(number, len(steps), f'{name}.{fmt}')
+
+    # An older artifact goes only once the current version of the same
+    # dashboard and format is on disk; a failed render keeps serving the old one
+    for filename in os.listdir(out_dir):
+        parts = filename.split('.')
+        if (len(parts) == 3 and parts[0] in DASHBOARDS and parts[1] != versions[parts[0]]
+                and os.path.exists(artifact_path(out_dir, parts[0], versions[parts[0]], parts[2]))):
+            os.remove(os.path.join(out_dir, filename))
+
+    return {'versions': versions, 'rendered': rendered, 'errors': errors}
+
+
+class DashboardCache:
+    """
+    Request-path lookup: serve the cached artifact, schedule a render if stale
+    """
+
+    def __init__(self, db_path, broker, out_dir=DEFAULT_OUT_DIR):
+        self.db_path = db_path
+        self.broker = broker
+        self.out_dir = out_dir
+        self.scheduled = {}  # versions of all dashboards -> render job from this process
+
+    def get(self, name, fmt='html'):
+        """
+        (path, fresh): the artifact for the current data version if rendered,
+        else the newest older one (or None) while a background render runs
+        """
+        conn = sqlite3.connect(self.db_path)
+        try:
+            versions = dashboard_versions(conn)
+        finally:
+            conn.close()
+        path = artifact_path(self.out_dir, name, versions[name], fmt)
+        if os.path.exists(path):
+            return path, True
+
+        # Submit again if the last render for these versions failed or the
+        # broker no longer knows the job
+        state = tuple(versions.values())
+        job = self.scheduled.get(state)
+        status = self.broker.status(job) if job is not None else None
+        if status is None or status['status'] == 'failed':
+            self.scheduled[state] = submit(
+                self.broker, render_dashboards.s(self.db_path, self.out_dir))
+
+        older = [
+            os.path.join(self.out_dir, filename)
+            for filename in (os.listdir(self.out_dir) if os.path.isdir(self.out_dir) else [])
+            if filename.startswith(f'{name}.') and filename.endswith(f'.{fmt}')
+        ]
+        return (max(older, key=os.path.getmtime) if older else None), False
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    from jobs import SQLiteBroker, run_workers
+
+    parser = argparse.ArgumentParser(description='Render or serve cached dashboards')
+    parser.add_argument('--db', default='credit.db')
+    parser.add_argument('--out-dir', default=DEFAULT_OUT_DIR)
+    args = parser.parse_args()
+
+    broker = SQLiteBroker()
+    cache = DashboardCache(args.db, broker, args.out_dir)
+
+    print("PORTFOLIO DASHBOARDS")
+    print("=" * 50)
+    for attempt in ('first request', 'after background render', 'repeat request'):
+        start = time.perf_counter()
+        results = {name: cache.get(name) for name in DASHBOARDS}
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{attempt}: {elapsed:.1f} ms")
+        for name, (path, fresh) in results.items():
+            print(f"  {name}: {path} ({'fresh' if fresh else 'stale/pending'})")
+        run_workers(broker, 1)
@@ -0,0 +1,254 @@
+# Data-quality profiling over the loan book
+#
+# One streaming pass over a loan export (see loan_io.iter_chunks) with
+# vectorized checks per chunk. Memory is bounded by the chunk size plus a
+# sorted array of the distinct IDs seen (8 bytes each) for duplicate / orphan
+# detection, and the input frames are never mutated (unlike script_2.py's
+# 'Payment Ratio' column).
+#
+# Usage: python data_quality.py loan_data.xlsx --customers customer_data.xlsx \
+#            --out data_quality_report.json
+import argparse
+import json
+
+import numpy as np
+
+from loan_io import DATE_COLUMNS, DEFAULT_CHUNKSIZE, iter_chunks
+
+REQUIRED_COLUMNS = [
+    'Customer ID', 'Loan ID', 'Loan Amount', 'Tenure', 'Interest Rate',
+    'Monthly payment', 'EMIs paid on Time', 'Date of Approval', 'End Date',
+]
+NUMERIC_COLUMNS = [
+    'Loan Amount', 'Tenure', 'Interest Rate', 'Monthly payment', 'EMIs paid on Time',
+]
+
+MAX_EXAMPLES = 10
+EMI_TOLERANCE = 0.10  # relative deviation from the compound-interest EMI
+
+
+class IdSet:
+    """
+    Set of integer IDs as one sorted array, merged chunk by chunk; memory
+    follows the number of distinct IDs, not the largest one
+    """
+
+    def __init__(self):
+        self.ids = np.zeros(0, dtype=np.int64)
+
+    def add(self, ids):
+        new = np.unique(np.asarray(ids, dtype=np.int64))
+        new = new[~self.contains(new)]
+        if len(new):
+            # Two sorted runs: the stable sort (timsort) merges them in linear time
+            self.ids = np.sort(np.concatenate([self.ids, new]), kind='stable')
+
+    def contains(self, ids):
+        ids = np.asarray(ids, dtype=np.int64)
+        positions = np.searchsorted(self.ids, ids)
+        result = np.zeros(len(ids), dtype=bool)
+        inside = positions < len(self.ids)
+        result[inside] = self.ids[positions[inside]] == ids[inside]
+        return result
+
+
+def expected_emi(loan_amount, interest_rate, tenure):
+    """
+    Vectorized calculate_emi (script_6.py) over numpy arrays
+    """
+    monthly_rate = interest_rate / (12 * 100)
+    growth = (1 + monthly_rate) ** tenure
+    with np.errstate(divide='ignore', invalid='ignore'):
+        emi = loan_amount * monthly_rate * growth / (growth - 1)
+    return np.where(monthly_rate == 0, loan_amount / tenure, emi)
+
+
+class LoanBookProfiler:
+    """
+    Accumulates check counts, examples and column ranges chunk by chunk
+    """
+
+    def __init__(self, customer_ids=None, emi_tolerance=EMI_TOLERANCE):
+        self.customer_ids = customer_ids
+        self.emi_tolerance = emi_tolerance
+        self.loan_ids = IdSet()
+        self.rows = 0
+        self.chunks = 0
+        self.checks = {}
+        self.columns = {}
+
+    def _flag(self, name, mask, row_numbers, loan_ids):
+        check = self.checks.setdefault(name, {'count': 0, 'examples': []})
+        hits = np.flatnonzero(mask)
+        check['count'] += len(hits)
+        for i in hits[:MAX_EXAMPLES - len(check['examples'])]:
+            check['examples'].append({'row': int(row_numbers[i]), 'loan_id': loan_ids[i]})
+
+    def _track_ranges(self, chunk, unparseable):
+        for column in NUMERIC_COLUMNS + DATE_COLUMNS:
+            values = chunk[column]
+            stats = self.columns.setdefault(
+                column, {'min': None, 'max': None, 'nulls': 0, 'unparseable': 0})
+            stats['unparseable'] += int(unparseable[column].sum())
+            stats['nulls'] += int(values.isna().sum()) - int(unparseable[column].sum())
+            if values.notna().any():
+                low, high = values.min(), values.max()
+                stats['min'] = low if stats['min'] is None else min(stats['min'], low)
+                stats['max'] = high if stats['max'] is None else max(stats['max'], high)
+
+    def update(self, chunk):
+        missing = [column for column in REQUIRED_COLUMNS if column not in chunk.columns]
+        if missing:
+            raise ValueError(f'Loan export is missing columns: {missing}')
+
+        row_numbers = np.arange(self.rows, self.rows + len(chunk)) + 2  # 1-based, after header
+        missing_values = chunk[REQUIRED_COLUMNS].isna().any(axis=1).to_numpy()
+        # Bad values must be reported, not crash the profiler: from here on
+        # `chunk` is a parsed copy with NaN / NaT where a value did not parse
+        chunk, unparseable = _parse(chunk)
+        loan_ids = [None if v != v else int(v) for v in chunk['Loan ID'].to_numpy()]
+
+        amount = chunk['Loan Amount'].to_numpy(dtype=float)
+        tenure = chunk['Tenure'].to_numpy(dtype=float)
+        rate = chunk['Interest Rate'].to_numpy(dtype=float)
+        payment = chunk['Monthly payment'].to_numpy(dtype=float)
+        emis_paid = chunk['EMIs paid on Time'].to_numpy(dtype=float)
+
+        flag = lambda name, mask: self._flag(name, mask, row_numbers, loan_ids)
+
+        # Range checks
+        flag('missing_values', missing_values)
+        flag('unparseable_values', unparseable.any(axis=1).to_numpy())
+        flag('loan_amount_non_positive', amount <= 0)
+        flag('tenure_non_positive', tenure <= 0)
+        flag('interest_rate_out_of_range', (rate < 0) | (rate > 100))
+        flag('monthly_payment_negative', payment < 0)
+        flag('emis_paid_negative', emis_paid < 0)
+        flag('end_before_approval',
+             (chunk['End Date'] < chunk['Date of Approval']).to_numpy())
+
+        # Ratio anomalies
+        flag('emis_paid_exceed_tenure', emis_paid > tenure)
+        emi = expected_emi(amount, rate, tenure)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            deviation = np.abs(payment - emi) / emi
+        flag('monthly_payment_mismatch', (tenure > 0) & (deviation > self.emi_tolerance))
+
+        # Referential checks
+        loan_id_column = chunk['Loan ID']
+        flag('loan_id_non_positive', (loan_id_column <= 0).to_numpy())
+        valid = (loan_id_column.notna() & (loan_id_column > 0)).to_numpy()
+        ids = loan_id_column[valid].to_numpy(dtype=np.int64)
+        duplicate = np.zeros(len(chunk), dtype=bool)
+        duplicate[valid] = self.loan_ids.contains(ids) | _duplicated(ids)
+        flag('duplicate_loan_id', duplicate)
+        self.loan_ids.add(ids)
+
+        if self.customer_ids is not None:
+            customer_column = chunk['Customer ID']
+            known = (customer_column.notna() & (customer_column > 0)).to_numpy()
+            orphan = customer_column.notna().to_numpy().copy()
+            orphan[known] = ~self.customer_ids.contains(
+                customer_column[known].to_numpy(dtype=np.int64)
+            )
+            flag('orphan_customer_id', orphan)
+
+        self._track_ranges(chunk, unparseable)
+        self.rows += len(chunk)
+        self.chunks += 1
+
+    def report(self, source):
+        return {
+            'source': source,
+            'rows': self.rows,
+            'chunks': self.chunks,
+            'checks': self.checks,
+            'columns': {
+                column: {key: _jsonable(value) for key, value in stats.items()}
+                for column, stats in self.columns.items()
+            },
+        }
+
+
+def _parse(chunk):
+    """
+    (copy of the required columns with numbers and dates coerced, frame of
+    which present values did not parse)
+    """
+    import pandas as pd
+
+    parsed = chunk[REQUIRED_COLUMNS].copy()
+    for column in REQUIRED_COLUMNS:
+        if column in DATE_COLUMNS:
+            parsed[column] = pd.to_datetime(chunk[column], errors='coerce')
+        else:
+            parsed[column] = pd.to_numeric(chunk[column], errors='coerce')
+    return parsed, parsed.isna() & chunk[REQUIRED_COLUMNS].notna()
+
+
+def _duplicated(ids):
+    """
+    Mask of IDs already seen earlier in the same array
+    """
+    order = np.argsort(ids, kind='stable')
+    sorted_ids = ids[order]
+    repeat = np.zeros(len(ids), dtype=bool)
+    repeat[1:] = sorted_ids[1:] == sorted_ids[:-1]
+    result = np.zeros(len(ids), dtype=bool)
+    result[order] = repeat
+    return result
+
+
+def _jsonable(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def load_customer_ids(path, chunksize=DEFAULT_CHUNKSIZE):
+    import pandas as pd
+
+    customer_ids = IdSet()
+    for chunk in iter_chunks(path, chunksize, parse_dates=False):
+        ids = pd.to_numeric(chunk['Customer ID'], errors='coerce')
+        customer_ids.add(ids[ids > 0].to_numpy(dtype=np.int64))
+    return customer_ids
+
+
+def profile_loan_book(loan_path, customer_path=None, chunksize=DEFAULT_CHUNKSIZE,
+                      emi_tolerance=EMI_TOLERANCE):
+    """
+    Run all checks over a loan export in a single pass and return the report
+    """
+    customer_ids = load_customer_ids(customer_path, chunksize) if customer_path else None
+    profiler = LoanBookProfiler(customer_ids, emi_tolerance)
+    for chunk in iter_chunks(loan_path, chunksize, parse_dates=False):
+        profiler.update(chunk)
+    return profiler.report(loan_path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Profile data quality of a loan export')
+    parser.add_argument('loans', help='loan export (xlsx or csv)')
+    parser.add_argument('--customers', help='customer export used for orphan checks')
+    parser.add_argument('--out', default='data_quality_report.json')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument('--emi-tolerance', type=float, default=EMI_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    report = profile_loan_book(args.loans, args.customers, args.chunksize, args.emi_tolerance)
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print("DATA QUALITY REPORT")
+    print("=" * 50)
+    print(f"Rows scanned: {report['rows']} in {report['chunks']} chunk(s)")
+    for name, check in report['checks'].items():
+        print(f"  {name}: {check['count']}")
+    print(f"\nReport written to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,336 @@
+# Materialized per-customer feature table for credit scoring
+#
+# Every scorer in script_4.py / script_6.py / script_7.py re-derives the same
+# aggregates from raw loan history on each call. This module keeps them in one
+# row per customer (SQLite), rebuilt in bulk on ingestion and updated on each
+# loan event, so scoring becomes credit_scoring.score_from_features(row).
+import sqlite3
+from datetime import datetime
+
+from credit_scoring import score_breakdown
+from score_cache import score_key
+
+# Bump whenever FEATURE_COLUMNS or their meaning changes; tables written with
+# an older version are dropped and must be rebuilt from raw loans.
+FEATURE_SCHEMA_VERSION = 1
+
+FEATURE_COLUMNS = [
+    'loan_count',          # number of loans taken in past
+    'payment_ratio_sum',   # sum of EMIs paid on Time / Tenure (avg = sum / count)
+    'current_year_loans',  # loans approved in the as-of year
+    'active_debt',         # sum of Loan Amount where End Date > as-of
+    'active_emi_sum',      # sum of Monthly payment where End Date > as-of
+]
+
+EMPTY_FEATURES = {
+    'loan_count': 0,
+    'payment_ratio_sum': 0.0,
+    'current_year_loans': 0,
+    'active_debt': 0,
+    'active_emi_sum': 0,
+}
+
+RATIO_TOLERANCE = 1e-9
+
+# A chunked rebuild writes here; swap_in_staged() replaces the live rows with it
+STAGING_TABLE = 'customer_features_staging'
+
+
+def compute_customer_features(loan_data, as_of, compacted=None):
+    """
+    Recompute the feature table from raw loan rows (one vectorized pass).
+    `compacted` (indexed by customer_id, with loan_count and
+    payment_ratio_sum) adds loans already folded away by compaction.
+    """
+    import pandas as pd
+
+    as_of = pd.Timestamp(as_of)
+    approval_dates = pd.to_datetime(loan_data['Date of Approval'])
+    active = pd.to_datetime(loan_data['End Date']) > as_of
+
+    loans = pd.DataFrame({
+        'Customer ID': loan_data['Customer ID'],
+        'payment_ratio': loan_data['EMIs paid on Time'] / loan_data['Tenure'],
+        'current_year': (approval_dates.dt.year == as_of.year).astype('int64'),
+        'active_debt': loan_data['Loan Amount'].where(active, 0),
+        'active_emi': loan_data['Monthly payment'].where(active, 0),
+    })
+
+    features = loans.groupby('Customer ID').agg(
+        loan_count=('payment_ratio', 'size'),
+        payment_ratio_sum=('payment_ratio', 'sum'),
+        current_year_loans=('current_year', 'sum'),
+        active_debt=('active_debt', 'sum'),
+        active_emi_sum=('active_emi', 'sum'),
+    )
+    if compacted is not None and len(compacted):
+        features = features.add(
+            compacted.reindex(columns=FEATURE_COLUMNS, fill_value=0), fill_value=0
+        ).astype({'loan_count': 'int64', 'current_year_loans': 'int64'})
+    features.index.name = 'customer_id'
+    return features[FEATURE_COLUMNS]
+
+
+class FeatureTableNotBuilt(RuntimeError):
+    """
+    The table has no as-of date yet: rebuild() (or reset()) it first
+    """
+
+
+class FeatureTable:
+    """
+    SQLite-backed customer feature snapshot
+    """
+
+    def __init__(self, path=':memory:'):
+        # Shareable with a writer thread (loan_service's group committer)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self._ensure_schema()
+
+    def _ensure_schema(self):
+        version = self.conn.execute('PRAGMA user_version').fetchone()[0]
+        if version == FEATURE_SCHEMA_VERSION:
+            return
+
+        # Derived data only: an outdated layout is discarded, not migrated
+        with self.conn:
+            self.conn.execute('DROP TABLE IF EXISTS customer_features')
+            self.conn.execute(f'DROP TABLE IF EXISTS {STAGING_TABLE}')
+            self.conn.execute('DROP TABLE IF EXISTS feature_meta')
+            self._create_rows_table('customer_features')
+            self.conn.execute(
+                'CREATE TABLE feature_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)'
+            )
+            self.conn.execute(f'PRAGMA user_version = {FEATURE_SCHEMA_VERSION}')
+
+    def _create_rows_table(self, name):
+        self.conn.execute(
+            f'CREATE TABLE {name} ('
+            ' customer_id INTEGER PRIMARY KEY,'
+            ' loan_count INTEGER NOT NULL,'
+            ' payment_ratio_sum REAL NOT NULL,'
+            ' current_year_loans INTEGER NOT NULL,'
+            ' active_debt INTEGER NOT NULL,'
+            ' active_emi_sum INTEGER NOT NULL)'
+        )
+
+    @property
+    def as_of(self):
+        row = self.conn.execute(
+            "SELECT value FROM feature_meta WHERE key = 'as_of'"
+        ).fetchone()
+        return datetime.fromisoformat(row[0]) if row else None
+
+    def built_as_of(self):
+        """
+        as_of, raising FeatureTableNotBuilt for a table never built
+        """
+        as_of = self.as_of
+        if as_of is None:
+            raise FeatureTableNotBuilt(
+                'Feature table has no as-of date; rebuild it from the loan data first'
+            )
+        return as_of
+
+    def rebuild(self, loan_data, as_of):
+        """
+        Bulk rebuild from raw loans (called on ingestion)
+        """
+        return self.reset(as_of, compute_customer_features(loan_data, as_of))
+
+    def reset(self, as_of, features=None):
+        """
+        Replace all rows and the as-of date in one transaction
+        """
+        with self.conn:
+            self.conn.execute('DELETE FROM customer_features')
+            self.conn.execute(
+                "INSERT OR REPLACE INTO feature_meta VALUES ('as_of', ?)",
+                (datetime.fromisoformat(str(as_of)).isoformat(),)
+            )
+            return self._insert_frame(features) if features is not None else 0
+
+    def write(self, features, staged=False):
+        """
+        Upsert rows from a compute_customer_features() frame; `staged` writes
+        one customer range of a chunked rebuild to the staging table instead
+        """
+        with self.conn:
+            return self._insert_frame(features, STAGING_TABLE if staged else 'customer_features')
+
+    def start_staging(self):
+        """
+        Empty staging table for a chunked rebuild; the live rows stay readable
+        until swap_in_staged()
+        """
+        with self.conn:
+            self.conn.execute(f'DROP TABLE IF EXISTS {STAGING_TABLE}')
+            self._create_rows_table(STAGING_TABLE)
+
+    def swap_in_staged(self, as_of):
+        """
+        Replace all rows with the staged ones and set the as-of date in one
+        transaction; returns the rows swapped in
+        """
+        with self.conn:
+            self.conn.execute('DELETE FROM customer_features')
+            rows = self.conn.execute(
+                f'INSERT INTO customer_features SELECT * FROM {STAGING_TABLE}'
+            ).rowcount
+            self.conn.execute(
+                "INSERT OR REPLACE INTO feature_meta VALUES ('as_of', ?)",
+                (datetime.fromisoformat(str(as_of)).isoformat(),)
+            )
+        with self.conn:
+            self.conn.execute(f'DROP TABLE {STAGING_TABLE}')
+        return rows
+
+    def _insert_frame(self, features, table='customer_features'):
+        rows = [
+            (int(customer_id), int(row.loan_count), float(row.payment_ratio_sum),
+             int(row.current_year_loans), float(row.active_debt), float(row.active_emi_sum))
+            for customer_id, row in zip(features.index, features.itertuples(index=False))
+        ]
+        self.conn.executemany(f'INSERT OR REPLACE INTO {table} VALUES (?, ?, ?, ?, ?, ?)', rows)
+        return len(rows)
+
+    def get(self, customer_id):
+        """
+        Feature row for one customer (zeros for customers without loans)
+        """
+        row = self.conn.execute(
+            f'SELECT {", ".join(FEATURE_COLUMNS)} FROM customer_features'
+            ' WHERE customer_id = ?',
+            (customer_id,)
+        ).fetchone()
+        if row is None:
+            return dict(EMPTY_FEATURES)
+        return dict(zip(FEATURE_COLUMNS, row))
+
+    def rows(self):
+        """
+        All stored rows as {customer_id: features}
+        """
+        return {
+            row[0]: dict(zip(FEATURE_COLUMNS, row[1:]))
+            for row in self.conn.execute(
+                f'SELECT customer_id, {", ".join(FEATURE_COLUMNS)} FROM customer_features'
+            )
+        }
+
+    def put_many(self, rows):
+        """
+        Overwrite full rows [(customer_id, features), ...] inside the caller's
+        transaction (no commit here)
+        """
+        self.conn.executemany(
+            'INSERT OR REPLACE INTO customer_features VALUES (?, ?, ?, ?, ?, ?)',
+            [[customer_id] + [features[column] for column in FEATURE_COLUMNS]
+             for customer_id, features in rows]
+        )
+
+    def score(self, customer_id, approved_limit, cache=None):
+        """
+        Score from the stored row; reused from `cache` (score_cache.ScoreCache)
+        while the row and as-of date are unchanged
+        """
+        return self.explain(customer_id, approved_limit, cache).credit_score
+
+    def explain(self, customer_id, approved_limit, cache=None):
+        """
+        ScoreBreakdown from the stored row, sharing score()'s cache entry
+        """
+        features = self.get(customer_id)
+        if cache is None:
+            return score_breakdown(features, approved_limit)
+        key = score_key(customer_id, features, approved_limit, self.built_as_of())
+        return cache.get_or_compute(key, lambda: score_breakdown(features, approved_limit))
+
+    def _add(self, customer_id, deltas):
+        columns = list(deltas)
+        values = [deltas.get(column, 0) for column in FEATURE_COLUMNS]
+        with self.conn:
+            self.conn.execute(
+                'INSERT INTO customer_features VALUES (?, ?, ?, ?, ?, ?)'
+                ' ON CONFLICT(customer_id) DO UPDATE SET '
+                + ', '.join(f'{c} = {c} + excluded.{c}' for c in columns),
+                [customer_id] + values
+            )
+
+    # Loan events -----------------------------------------------------------
+
+    def record_loan(self, loan):
+        """
+        New loan row (same keys as loan_data.xlsx)
+        """
+        as_of = self.built_as_of()
+        approval_date = datetime.fromisoformat(str(loan['Date of Approval']))
+        end_date = datetime.fromisoformat(str(loan['End Date']))
+        is_active = end_date > as_of
+
+        self._add(loan['Customer ID'], {
+            'loan_count': 1,
+            'payment_ratio_sum': loan.get('EMIs paid on Time', 0) / loan['Tenure'],
+            'current_year_loans': int(approval_date.year == as_of.year),
+            'active_debt': loan['Loan Amount'] if is_active else 0,
+            'active_emi_sum': loan['Monthly payment'] if is_active else 0,
+        })
+
+    def record_emi_paid(self, customer_id, tenure):
+        """
+        One more EMI paid on time for a loan of the given tenure
+        """
+        self._add(customer_id, {'payment_ratio_sum': 1 / tenure})
+
+    def close_loan(self, customer_id, loan_amount, monthly_payment):
+        """
+        Active loan reached its End Date
+        """
+        self._add(customer_id, {
+            'active_debt': -loan_amount,
+            'active_emi_sum': -monthly_payment,
+        })
+
+    # Consistency -----------------------------------------------------------
+
+    def verify(self, loan_data):
+        """
+        Compare stored rows against recomputation from raw loans.
+        Returns a list of (customer_id, column, stored, expected) mismatches.
+        """
+        expected = compute_customer_features(loan_data, self.built_as_of())
+        stored = self.rows()
+
+        mismatches = []
+        for customer_id in sorted(set(stored) | set(int(c) for c in expected.index)):
+            have = stored.get(customer_id, EMPTY_FEATURES)
+            if customer_id in expected.index:
+                want = expected.loc[customer_id].to_dict()
+            else:
+                want = EMPTY_FEATURES
+            for column in FEATURE_COLUMNS:
+                if abs(have[column] - want[column]) > RATIO_TOLERANCE:
+                    mismatches.append((customer_id, column, have[column], want[column]))
+        return mismatches
+
+
+if __name__ == '__main__':
+    import pandas as pd
+
+    customer_data = pd.read_excel('customer_data.xlsx')
+    loan_data = pd.read_excel('loan_data.xlsx')
+    as_of = datetime(2025, 7, 21)  # Current date as per prompt
+
+    table = FeatureTable()
+    print("CUSTOMER FEATURE TABLE")
+    print("=" * 50)
+    print(f"Schema version: {FEATURE_SCHEMA_VERSION}")
+    print(f"Rows built: {table.rebuild(loan_data, as_of)}")
+
+    for customer in customer_data.head(5).to_dict('records'):
+        customer_id = customer['Customer ID']
+        print(f"Customer {customer_id}: {table.get(customer_id)} "
+              f"-> score {table.score(customer_id, customer['Approved Limit'])}")
+
+    mismatches = table.verify(loan_data)
+    print(f"\nConsistency check: {len(mismatches)} mismatches")
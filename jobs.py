@@ -0,0 +1,363 @@
+# Background job subsystem with a SQLite broker
+#
+# docker-compose.yml plans a Celery worker on Redis; this is the local
+# stand-in with the same shape: named tasks, fan-out into a group of child
+# jobs with a callback that receives all child results (fan-in, like a Celery
+# chord), retries with a delay, and per-job progress. The broker is a SQLite
+# database, so ':memory:' gives an in-process queue for tests and a file
+# path lets several worker processes share one queue without Redis.
+#
+# A claimed job holds a lease; progress reports renew it. If a worker dies
+# mid-job the lease expires and the job is claimed again, and a late
+# complete/fail from the old attempt is ignored.
+import json
+import sqlite3
+import threading
+import time
+import traceback
+
+BROKER_SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS jobs ('
+    ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+    ' name TEXT NOT NULL,'
+    ' args TEXT NOT NULL,'
+    " status TEXT NOT NULL DEFAULT 'queued',"  # queued | running | done | failed
+    ' attempts INTEGER NOT NULL DEFAULT 0,'
+    ' eta REAL NOT NULL DEFAULT 0,'
+    ' claimed_at REAL,'
+    ' group_id INTEGER,'
+    ' position INTEGER,'
+    ' result TEXT,'
+    ' error TEXT,'
+    ' progress_done INTEGER NOT NULL DEFAULT 0,'
+    ' progress_total INTEGER NOT NULL DEFAULT 0,'
+    ' progress_message TEXT)',
+    'CREATE TABLE IF NOT EXISTS job_groups ('
+    ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+    ' pending INTEGER NOT NULL,'
+    " status TEXT NOT NULL DEFAULT 'running',"  # running | done | failed
+    ' callback_name TEXT,'
+    ' callback_args TEXT,'
+    ' callback_job INTEGER)',
+    'CREATE INDEX IF NOT EXISTS jobs_queued ON jobs (status, eta)',
+]
+
+DEFAULT_LEASE = 300.0  # seconds a running job may go without a progress report
+
+REGISTRY = {}
+
+
+class Task:
+    """
+    A registered job function: func(ctx, *args) -> JSON-serializable result
+    """
+
+    def __init__(self, name, func, max_retries, retry_delay):
+        self.name = name
+        self.func = func
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+
+    def s(self, *args):
+        """
+        Signature (name, args) for submit / fan_out
+        """
+        return (self.name, list(args))
+
+
+def task(name, max_retries=3, retry_delay=0.5):
+    """
+    Register a job function under `name`
+    """
+    def register(func):
+        REGISTRY[name] = Task(name, func, max_retries, retry_delay)
+        return REGISTRY[name]
+    return register
+
+
+class SQLiteBroker:
+    """
+    Job queue, results and group bookkeeping in one SQLite database
+    """
+
+    def __init__(self, path=':memory:', lease=DEFAULT_LEASE):
+        self.lease = lease
+        # Autocommit mode; every state change runs in an explicit IMMEDIATE
+        # transaction so claims stay atomic across processes sharing a file
+        self.conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self._transaction() as conn:
+            for statement in BROKER_SCHEMA:
+                conn.execute(statement)
+
+    class _Transaction:
+        def __init__(self, broker):
+            self.broker = broker
+
+        def __enter__(self):
+            self.broker.lock.acquire()
+            self.broker.conn.execute('BEGIN IMMEDIATE')
+            return self.broker.conn
+
+        def __exit__(self, exc_type, exc, tb):
+            try:
+                self.broker.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+            finally:
+                self.broker.lock.release()
+
+    def _transaction(self):
+        return self._Transaction(self)
+
+    def _insert_job(self, conn, name, args, group_id=None, position=None, eta=0.0):
+        cursor = conn.execute(
+            'INSERT INTO jobs (name, args, group_id, position, eta) VALUES (?, ?, ?, ?, ?)',
+            (name, json.dumps(args), group_id, position, eta)
+        )
+        return cursor.lastrowid
+
+    def enqueue(self, name, args):
+        with self._transaction() as conn:
+            return self._insert_job(conn, name, args)
+
+    def enqueue_group(self, signatures, callback=None):
+        """
+        Fan-out: one job per signature; `callback` (name, args) is enqueued
+        with [child results in order] prepended once every child is done
+        """
+        callback_name, callback_args = callback if callback else (None, [])
+        with self._transaction() as conn:
+            group_id = conn.execute(
+                'INSERT INTO job_groups (pending, callback_name, callback_args) VALUES (?, ?, ?)',
+                (len(signatures), callback_name, json.dumps(callback_args))
+            ).lastrowid
+            for position, (name, args) in enumerate(signatures):
+                self._insert_job(conn, name, args, group_id, position)
+            if not signatures:
+                self._finish_group(conn, group_id)
+        return group_id
+
+    def _finish_group(self, conn, group_id):
+        callback_name, callback_args = conn.execute(
+            'SELECT callback_name, callback_args FROM job_groups WHERE id = ?', (group_id,)
+        ).fetchone()
+        callback_job = None
+        if callback_name:
+            results = [
+                json.loads(result) for (result,) in conn.execute(
+                    'SELECT result FROM jobs WHERE group_id = ? ORDER BY position', (group_id,)
+                )
+            ]
+            callback_job = self._insert_job(
+                conn, callback_name, [results] + json.loads(callback_args)
+            )
+        conn.execute(
+            "UPDATE job_groups SET status = 'done', callback_job = ? WHERE id = ?",
+            (callback_job, group_id)
+        )
+
+    def claim(self):
+        """
+        Atomically take the oldest due job, or a running one whose lease has
+        expired; returns (id, name, args, attempts) or None
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT id, name, args, attempts FROM jobs WHERE (status = 'queued' AND eta <= ?)"
+                " OR (status = 'running' AND claimed_at <= ?) ORDER BY id LIMIT 1",
+                (now, now - self.lease)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, claimed_at = ?"
+                ' WHERE id = ?', (now, row[0])
+            )
+            return row[0], row[1], json.loads(row[2]), row[3] + 1
+
+    def _owns(self, conn, job_id, attempt):
+        """
+        Whether `attempt` still holds the job (None: whoever holds it)
+        """
+        row = conn.execute('SELECT status, attempts FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return row[0] == 'running' and attempt in (None, row[1])
+
+    def complete(self, job_id, result, attempt=None):
+        self.complete_encoded(job_id, json.dumps(result), attempt)
+
+    def complete_encoded(self, job_id, encoded, attempt=None):
+        """
+        complete() with the result already JSON-encoded
+        """
+        with self._transaction() as conn:
+            if not self._owns(conn, job_id, attempt):
+                return  # lease expired and the job was claimed again
+            conn.execute(
+                "UPDATE jobs SET status = 'done', result = ? WHERE id = ?", (encoded, job_id)
+            )
+            group_id = conn.execute(
+                'SELECT group_id FROM jobs WHERE id = ?', (job_id,)
+            ).fetchone()[0]
+            if group_id is not None:
+                conn.execute(
+                    'UPDATE job_groups SET pending = pending - 1 WHERE id = ?', (group_id,)
+                )
+                pending, status = conn.execute(
+                    'SELECT pending, status FROM job_groups WHERE id = ?', (group_id,)
+                ).fetchone()
+                if pending == 0 and status == 'running':
+                    self._finish_group(conn, group_id)
+
+    def fail(self, job_id, error, retry_at=None, attempt=None):
+        """
+        Requeue for `retry_at` (epoch seconds) or mark failed, failing its group
+        """
+        with self._transaction() as conn:
+            if not self._owns(conn, job_id, attempt):
+                return
+            if retry_at is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = 'queued', error = ?, eta = ? WHERE id = ?",
+                    (error, retry_at, job_id)
+                )
+                return
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ? WHERE id = ?", (error, job_id)
+            )
+            conn.execute(
+                "UPDATE job_groups SET status = 'failed'"
+                ' WHERE id = (SELECT group_id FROM jobs WHERE id = ?)', (job_id,)
+            )
+
+    def set_progress(self, job_id, done, total, message=None):
+        with self._transaction() as conn:
+            conn.execute(
+                'UPDATE jobs SET progress_done = ?, progress_total = ?, progress_message = ?,'
+                " claimed_at = ? WHERE id = ? AND status = 'running'",
+                (done, total, message, time.time(), job_id)
+            )
+
+    def status(self, job_id):
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT name, status, attempts, result, error, progress_done,'
+                ' progress_total, progress_message FROM jobs WHERE id = ?', (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        name, status, attempts, result, error, done, total, message = row
+        return {
+            'id': job_id, 'name': name, 'status': status, 'attempts': attempts,
+            'result': json.loads(result) if result is not None else None,
+            'error': error, 'progress': {'done': done, 'total': total, 'message': message},
+        }
+
+    def group_status(self, group_id):
+        with self.lock:
+            pending, status, callback_job = self.conn.execute(
+                'SELECT pending, status, callback_job FROM job_groups WHERE id = ?', (group_id,)
+            ).fetchone()
+        return {'id': group_id, 'pending': pending, 'status': status, 'callback_job': callback_job}
+
+    def outstanding(self):
+        """
+        Number of jobs still queued or running
+        """
+        with self.lock:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'running')"
+            ).fetchone()[0]
+
+
+class JobContext:
+    """
+    Passed to every task as its first argument
+    """
+
+    def __init__(self, broker, job_id, attempt):
+        self.broker = broker
+        self.job_id = job_id
+        self.attempt = attempt
+
+    def progress(self, done, total, message=None):
+        self.broker.set_progress(self.job_id, done, total, message)
+
+    def fan_out(self, signatures, callback=None):
+        return self.broker.enqueue_group(signatures, callback)
+
+    def submit(self, signature):
+        name, args = signature
+        return self.broker.enqueue(name, args)
+
+
+def submit(broker, signature):
+    name, args = signature
+    return broker.enqueue(name, args)
+
+
+class Worker:
+    """
+    Claims and runs jobs from a broker; several can run side by side
+    """
+
+    def __init__(self, broker, registry=REGISTRY):
+        self.broker = broker
+        self.registry = registry
+
+    def run_once(self):
+        """
+        Run one due job; False if nothing was due
+        """
+        claimed = self.broker.claim()
+        if claimed is None:
+            return False
+
+        job_id, name, args, attempt = claimed
+        task_ = self.registry.get(name)
+        if task_ is None:
+            self.broker.fail(job_id, f'Unknown task: {name}', attempt=attempt)
+            return True
+
+        try:
+            result = task_.func(JobContext(self.broker, job_id, attempt), *args)
+            # Encoding here, so a result JSON cannot hold fails the job
+            # instead of the worker thread
+            encoded = json.dumps(result)
+        except Exception:
+            error = traceback.format_exc()
+            retry_at = None
+            if attempt <= task_.max_retries:
+                retry_at = time.time() + task_.retry_delay * attempt
+            self.broker.fail(job_id, error, retry_at, attempt)
+        else:
+            self.broker.complete_encoded(job_id, encoded, attempt)
+        return True
+
+    def run_until_idle(self, poll_interval=0.01):
+        """
+        Keep working until no job is queued or running (retries included)
+        """
+        while True:
+            if not self.run_once():
+                if self.broker.outstanding() == 0:
+                    return
+                time.sleep(poll_interval)
+
+    def run_forever(self, poll_interval=0.5):
+        while True:
+            if not self.run_once():
+                time.sleep(poll_interval)
+
+
+def run_workers(broker, count, registry=REGISTRY):
+    """
+    Drain the broker with `count` worker threads
+    """
+    threads = [
+        threading.Thread(target=Worker(broker, registry).run_until_idle)
+        for _ in range(count)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
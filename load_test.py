@@ -0,0 +1,274 @@
+# Load generator for the credit approval API endpoints
+#
+# Replays a weighted mix of the five script_3.py endpoints with request
+# parameters sampled from the exports: customer IDs, salaries and ages from
+# customer_data.xlsx; loan amounts, interest rates, tenures and loan IDs from
+# loan_data.xlsx. By default it starts api_server.py on a scratch copy of the
+# data and drives it with concurrent keep-alive clients; --url targets an
+# already running server (e.g. the Django app) instead.
+#
+# Reports throughput, latency percentiles and error rates per endpoint and
+# saves them as JSON (with the git revision) so runs can be compared across
+# versions with --compare.
+#
+# Usage: python load_test.py [--clients 16] [--duration 20] [--compare old.json]
+import argparse
+import bisect
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+
+DEFAULT_MIX = {
+    'check-eligibility': 40,
+    'create-loan': 20,
+    'view-loans': 20,
+    'view-loan': 15,
+    'register': 5,
+}
+PERCENTILES = [50, 90, 99]
+DEFAULT_RESULTS_DIR = 'load_results'
+
+
+class TrafficModel:
+    """
+    Request generator sampling from the empirical distributions of the exports
+    """
+
+    def __init__(self, customer_data, loan_data, seed):
+        self.rng = random.Random(seed)
+        self.customer_ids = customer_data['Customer ID'].tolist()
+        self.salaries = customer_data['Monthly Salary'].tolist()
+        self.ages = customer_data['Age'].tolist()
+        self.loan_ids = loan_data['Loan ID'].tolist()
+        self.loans = list(zip(loan_data['Loan Amount'].tolist(),
+                              loan_data['Interest Rate'].tolist(),
+                              loan_data['Tenure'].tolist()))
+        self.lock = threading.Lock()
+        self.sequence = 0
+
+    def _loan_body(self):
+        amount, rate, tenure = self.rng.choice(self.loans)
+        return {'customer_id': self.rng.choice(self.customer_ids), 'loan_amount': amount,
+                'interest_rate': rate, 'tenure': tenure}
+
+    def request(self, endpoint):
+        """
+        (method, path, body or None, headers)
+        """
+        with self.lock:  # random.Random is not safe to share unlocked
+            self.sequence += 1
+            if endpoint == 'register':
+                return 'POST', '/register', {
+                    'first_name': 'Load', 'last_name': f'Test{self.sequence}',
+                    'age': self.rng.choice(self.ages),
+                    'monthly_income': self.rng.choice(self.salaries),
+                    'phone_number': 9000000000 + self.sequence,
+                }, {}
+            if endpoint == 'check-eligibility':
+                return 'POST', '/check-eligibility', self._loan_body(), {}
+            if endpoint == 'create-loan':
+                return 'POST', '/create-loan', self._loan_body(), {
+                    'Idempotency-Key': f'load-{os.getpid()}-{self.sequence}'}
+            if endpoint == 'view-loan':
+                return 'GET', f'/view-loan/{self.rng.choice(self.loan_ids)}', None, {}
+            if endpoint == 'explain-score':
+                return 'GET', f'/explain-score/{self.rng.choice(self.customer_ids)}', None, {}
+            return 'GET', f'/view-loans/{self.rng.choice(self.customer_ids)}', None, {}
+
+
+class EndpointStats:
+    def __init__(self):
+        self.latencies = []  # seconds
+        self.statuses = {}
+
+    def record(self, status, latency):
+        self.latencies.append(latency)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def summary(self, elapsed):
+        latencies = sorted(self.latencies)
+        count = len(latencies)
+        errors = sum(n for status, n in self.statuses.items()
+                     if not isinstance(status, int) or status >= 500)
+        summary = {
+            'requests': count,
+            'throughput': count / elapsed,
+            'error_rate': errors / count if count else 0.0,
+            'statuses': {str(status): n for status, n in sorted(self.statuses.items(), key=str)},
+        }
+        for p in PERCENTILES:
+            summary[f'p{p}_ms'] = latencies[min(count - 1, count * p // 100)] * 1000 if count else None
+        return summary
+
+
+def client(base_url, traffic, mix, deadline, stats, lock):
+    parts = urlsplit(base_url)
+    endpoints = list(mix)
+    cumulative = []
+    total = 0
+    for endpoint in endpoints:
+        total += mix[endpoint]
+        cumulative.append(total)
+    rng = random.Random()
+    conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+    local = {endpoint: EndpointStats() for endpoint in endpoints}
+
+    while time.monotonic() < deadline:
+        endpoint = endpoints[bisect.bisect_right(cumulative, rng.random() * total)]
+        method, path, body, headers = traffic.request(endpoint)
+        payload = json.dumps(body).encode() if body is not None else None
+        if payload is not None:
+            headers = dict(headers, **{'Content-Type': 'application/json'})
+        start = time.perf_counter()
+        try:
+            conn.request(method, path, body=payload, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException) as exc:
+            status = type(exc).__name__
+            conn.close()
+            conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+        local[endpoint].record(status, time.perf_counter() - start)
+    conn.close()
+
+    with lock:
+        for endpoint, local_stats in local.items():
+            stats[endpoint].latencies.extend(local_stats.latencies)
+            for status, n in local_stats.statuses.items():
+                stats[endpoint].statuses[status] = stats[endpoint].statuses.get(status, 0) + n
+
+
+def run_load(base_url, traffic, mix, clients, duration):
+    stats = {endpoint: EndpointStats() for endpoint in mix}
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+    start = time.monotonic()
+    threads = [threading.Thread(target=client, args=(base_url, traffic, mix, deadline, stats, lock))
+               for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+    return {endpoint: endpoint_stats.summary(elapsed) for endpoint, endpoint_stats in stats.items()}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_local_server(db_path, as_of, timeout=120):
+    """
+    Launch api_server.py in a subprocess and wait until it accepts connections
+    """
+    port = free_port()
+    command = [sys.executable, 'api_server.py', '--db', db_path, '--port', str(port)]
+    if as_of:
+        command += ['--as-of', as_of]
+    process = subprocess.Popen(command)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'api_server.py exited with status {process.returncode}')
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return process, f'http://127.0.0.1:{port}'
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('api_server.py did not start in time')
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, baseline=None):
+    print(f"{'endpoint':<18} {'req/s':>9} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for endpoint, summary in results.items():
+        line = (f"{endpoint:<18} {summary['throughput']:>9.1f} "
+                + ' '.join(f"{summary[f'p{p}_ms'] or 0:>8.2f}" for p in PERCENTILES)
+                + f" {summary['error_rate']:>6.1%}")
+        old = (baseline or {}).get(endpoint)
+        if old and old['throughput']:
+            line += (f"  (req/s {summary['throughput'] / old['throughput'] - 1:+.0%},"
+                     f" p99 {summary['p99_ms'] - old['p99_ms']:+.2f} ms)")
+        print(line)
+
+
+def main(argv=None):
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description='Load test the credit approval API')
+    parser.add_argument('--url', help='target a running server instead of starting one')
+    parser.add_argument('--customers', default='customer_data.xlsx')
+    parser.add_argument('--loans', default='loan_data.xlsx')
+    parser.add_argument('--as-of', default='2025-07-21', help='business date for the local server')
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=20, help='seconds')
+    parser.add_argument('--mix', type=json.loads, default=DEFAULT_MIX,
+                        help='JSON {endpoint: weight}')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--label', default='local')
+    parser.add_argument('--results-dir', default=DEFAULT_RESULTS_DIR)
+    parser.add_argument('--compare', help='earlier results JSON to compare against')
+    args = parser.parse_args(argv)
+
+    traffic = TrafficModel(pd.read_excel(args.customers), pd.read_excel(args.loans), args.seed)
+
+    with tempfile.TemporaryDirectory() as scratch:
+        server = None
+        base_url = args.url
+        if base_url is None:
+            server, base_url = start_local_server(os.path.join(scratch, 'credit.db'), args.as_of)
+        try:
+            results = run_load(base_url, traffic, args.mix, args.clients, args.duration)
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+
+    record = {
+        'label': args.label,
+        'revision': git_revision(),
+        'started': datetime.now().isoformat(timespec='seconds'),
+        'config': {'url': args.url or 'local', 'clients': args.clients,
+                   'duration': args.duration, 'mix': args.mix, 'seed': args.seed},
+        'endpoints': results,
+    }
+    os.makedirs(args.results_dir, exist_ok=True)
+    path = os.path.join(args.results_dir,
+                        f"{record['started'].replace(':', '')}-{args.label}-{record['revision']}.json")
+    with open(path, 'w') as f:
+        json.dump(record, f, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['endpoints']
+
+    print("API LOAD TEST")
+    print("=" * 50)
+    print(f"Target: {base_url} ({args.clients} clients, {args.duration:g}s, revision {record['revision']})")
+    print_results(results, baseline)
+    print(f"Saved: {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,246 @@
+# Shared read-only loan book, memory-mapped by every worker process
+#
+# Each API / worker process used to hold its own pandas copy of the loan
+# export, so memory grew with the worker count. Ingestion instead publishes
+# the book once as a file of fixed-width little-endian columns, sorted by
+# customer, plus a customer index. Workers mmap it read-only: the pages live
+# in the OS page cache once and are shared by every process, and column access
+# is a zero-copy memoryview (or numpy.frombuffer for analytics).
+#
+# Publishing is atomic: generation N is written to book.<N>.bin, then the
+# CURRENT file is replaced to point at it. Readers call refresh() to pick up a
+# new generation; a request keeps using the snapshot it started with, and the
+# old mapping stays valid after its file is unlinked.
+#
+# Usage: python loan_book.py --book-dir loan_book [--loans loan_data.xlsx]
+import bisect
+import mmap
+import os
+import struct
+from datetime import date
+
+from credit_scoring import LoanRecord
+
+MAGIC = b'LOANBK01'
+HEADER = struct.Struct('<8sQQQ')  # magic, generation, loan rows, customers
+CURRENT_FILE = 'CURRENT'
+KEEP_GENERATIONS = 2
+
+# (column, struct / memoryview format); dates are proleptic ordinals
+COLUMNS = [
+    ('customer_id', 'q'),
+    ('loan_id', 'q'),
+    ('loan_amount', 'd'),
+    ('interest_rate', 'd'),
+    ('monthly_payment', 'd'),
+    ('tenure', 'i'),
+    ('emis_paid_on_time', 'i'),
+    ('date_of_approval', 'i'),
+    ('end_date', 'i'),
+]
+
+# loan_data.xlsx column -> book column
+SOURCE_COLUMNS = {
+    'Customer ID': 'customer_id',
+    'Loan ID': 'loan_id',
+    'Loan Amount': 'loan_amount',
+    'Interest Rate': 'interest_rate',
+    'Monthly payment': 'monthly_payment',
+    'Tenure': 'tenure',
+    'EMIs paid on Time': 'emis_paid_on_time',
+    'Date of Approval': 'date_of_approval',
+    'End Date': 'end_date',
+}
+
+
+def _aligned(offset):
+    return (offset + 7) // 8 * 8
+
+
+def _layout(rows, customers):
+    """
+    Byte offset of every column and of the customer index, and the file size
+    """
+    offsets = {}
+    position = _aligned(HEADER.size)
+    for name, code in COLUMNS:
+        offsets[name] = position
+        position = _aligned(position + rows * struct.calcsize(code))
+    offsets['index_ids'] = position
+    position += customers * 8
+    offsets['index_starts'] = position
+    position += (customers + 1) * 8
+    return offsets, position
+
+
+def current_generation(book_dir):
+    try:
+        with open(os.path.join(book_dir, CURRENT_FILE)) as f:
+            return int(f.read().strip())
+    except FileNotFoundError:
+        return None
+
+
+def generation_path(book_dir, generation):
+    return os.path.join(book_dir, f'book.{generation}.bin')
+
+
+def publish_loan_book(loan_data, book_dir, keep=KEEP_GENERATIONS):
+    """
+    Write `loan_data` (loan_data.xlsx columns) as the next generation and
+    switch CURRENT to it; returns the new generation number
+    """
+    import numpy as np
+
+    os.makedirs(book_dir, exist_ok=True)
+    generation = (current_generation(book_dir) or 0) + 1
+
+    frame = loan_data[list(SOURCE_COLUMNS)].rename(columns=SOURCE_COLUMNS)
+    frame = frame.sort_values(['customer_id', 'loan_id'], kind='stable')
+    customer_ids, starts = np.unique(frame['customer_id'].to_numpy(), return_index=True)
+    offsets, size = _layout(len(frame), len(customer_ids))
+
+    path = generation_path(book_dir, generation)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.truncate(size)
+        f.write(HEADER.pack(MAGIC, generation, len(frame), len(customer_ids)))
+        for name, code in COLUMNS:
+            values = frame[name]
+            if name in ('date_of_approval', 'end_date'):
+                values = values.map(lambda value: value.toordinal())
+            f.seek(offsets[name])
+            f.write(values.to_numpy().astype(f'<{code}').tobytes())
+        f.seek(offsets['index_ids'])
+        f.write(customer_ids.astype('<q').tobytes())
+        f.write(np.append(starts, len(frame)).astype('<q').tobytes())
+    os.replace(tmp_path, path)
+
+    current_tmp = os.path.join(book_dir, f'{CURRENT_FILE}.tmp')
+    with open(current_tmp, 'w') as f:
+        f.write(str(generation))
+    os.replace(current_tmp, os.path.join(book_dir, CURRENT_FILE))
+
+    for old in range(generation - keep, 0, -1):
+        try:
+            os.remove(generation_path(book_dir, old))  # mappings in readers stay valid
+        except FileNotFoundError:
+            break
+        except OSError:
+            pass  # still open elsewhere on platforms that forbid unlinking
+    return generation
+
+
+class LoanBookSnapshot:
+    """
+    One mapped generation; every accessor is zero-copy
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buffer = memoryview(self._mmap)
+        magic, self.generation, self.rows, customers = HEADER.unpack_from(buffer)
+        if magic != MAGIC:
+            raise ValueError(f'Not a loan book file: {path}')
+
+        offsets, _ = _layout(self.rows, customers)
+        self.columns = {
+            name: buffer[offsets[name]:offsets[name] + self.rows * struct.calcsize(code)].cast(code)
+            for name, code in COLUMNS
+        }
+        self.customer_ids = buffer[offsets['index_ids']:offsets['index_starts']].cast('q')
+        self._starts = buffer[offsets['index_starts']:offsets['index_starts'] + (customers + 1) * 8].cast('q')
+        # loans created after publishing have higher IDs (loan_service numbering)
+        self.last_loan_id = max(self.columns['loan_id'], default=0)
+
+    def __len__(self):
+        return self.rows
+
+    def column(self, name):
+        return self.columns[name]
+
+    def array(self, name):
+        """
+        Read-only numpy view of a column (no copy)
+        """
+        import numpy as np
+
+        return np.frombuffer(self.columns[name], dtype=f'<{dict(COLUMNS)[name]}')
+
+    def rows_for(self, customer_id):
+        """
+        range of row positions holding this customer's loans
+        """
+        i = bisect.bisect_left(self.customer_ids, customer_id)
+        if i == len(self.customer_ids) or self.customer_ids[i] != customer_id:
+            return range(0)
+        return range(self._starts[i], self._starts[i + 1])
+
+    def loans_for(self, customer_id):
+        """
+        The customer's loans as LoanRecord tuples (for score_loan_records)
+        """
+        columns = self.columns
+        return [
+            LoanRecord(
+                columns['loan_amount'][row],
+                columns['tenure'][row],
+                columns['emis_paid_on_time'][row],
+                date.fromordinal(columns['date_of_approval'][row]),
+                date.fromordinal(columns['end_date'][row]),
+            )
+            for row in self.rows_for(customer_id)
+        ]
+
+
+class LoanBook:
+    """
+    Reader handle on a book directory; `snapshot` is swapped atomically
+    """
+
+    def __init__(self, book_dir):
+        self.book_dir = book_dir
+        self.snapshot = None
+        if not self.refresh():
+            raise FileNotFoundError(f'No loan book published in {book_dir}')
+
+    @property
+    def generation(self):
+        return self.snapshot.generation
+
+    def refresh(self):
+        """
+        Map the current generation if it changed; True if a new one was mapped
+        """
+        generation = current_generation(self.book_dir)
+        if generation is None or (self.snapshot and generation == self.snapshot.generation):
+            return False
+        self.snapshot = LoanBookSnapshot(generation_path(self.book_dir, generation))
+        return True
+
+    def loans_for(self, customer_id):
+        return self.snapshot.loans_for(customer_id)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    from loan_io import iter_chunks
+
+    parser = argparse.ArgumentParser(description='Publish the shared loan book')
+    parser.add_argument('--loans', default='loan_data.xlsx')
+    parser.add_argument('--book-dir', default='loan_book')
+    args = parser.parse_args()
+
+    import pandas as pd
+
+    loans = pd.concat(iter_chunks(args.loans), ignore_index=True)
+    generation = publish_loan_book(loans, args.book_dir)
+    book = LoanBook(args.book_dir)
+    print("SHARED LOAN BOOK")
+    print("=" * 50)
+    print(f"Generation {generation}: {len(book.snapshot)} loans, "
+          f"{len(book.snapshot.customer_ids)} customers")
+    print(f"File: {generation_path(args.book_dir, generation)} "
+          f"({os.path.getsize(generation_path(args.book_dir, generation)) / 1024:.1f} KiB)")
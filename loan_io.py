@@ -0,0 +1,58 @@
+# Chunked readers for customer/loan exports (xlsx or csv)
+#
+# pd.read_excel loads a whole workbook at once; for large exports we stream
+# rows with openpyxl's read-only mode (or pandas' csv chunksize) and hand out
+# DataFrames of at most `chunksize` rows.
+import os
+
+DEFAULT_CHUNKSIZE = 100_000
+
+DATE_COLUMNS = ['Date of Approval', 'End Date']
+
+
+def _iter_xlsx_chunks(path, chunksize):
+    import pandas as pd
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = list(next(rows, ()))
+        batch = []
+        for row in rows:
+            if all(value is None for value in row):
+                continue  # formatted but empty trailing rows
+            batch.append(row)
+            if len(batch) >= chunksize:
+                yield pd.DataFrame(batch, columns=header)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=header)
+    finally:
+        workbook.close()
+
+
+def iter_chunks(path, chunksize=DEFAULT_CHUNKSIZE, parse_dates=True):
+    """
+    Yield DataFrames of at most `chunksize` rows from an xlsx or csv export.
+    Date columns are parsed strictly unless `parse_dates` is False (raw values,
+    e.g. for data_quality.py to report what does not parse)
+    """
+    import pandas as pd
+
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.xlsx', '.xlsm'):
+        chunks = _iter_xlsx_chunks(path, chunksize)
+    elif extension == '.csv':
+        chunks = pd.read_csv(path, chunksize=chunksize)
+    else:
+        raise ValueError(f'Unsupported export format: {path}')
+
+    for chunk in chunks:
+        if not parse_dates:
+            yield chunk
+            continue
+        for column in DATE_COLUMNS:
+            if column in chunk.columns:
+                chunk[column] = pd.to_datetime(chunk[column])
+        yield chunk
@@ -0,0 +1,303 @@
+# /create-loan flow: idempotent, concurrent-safe, group-committed
+#
+# script_3.py specs /create-loan as "use same eligibility check, create loan
+# if approved". Done naively that is check-then-insert: two concurrent
+# requests for one customer can both pass the approved-limit and 50%-EMI
+# checks. Here:
+#
+# - each customer maps to one of N striped locks; the check and the update of
+#   that customer's in-memory aggregates happen under it, so requests for the
+#   same customer serialize while different customers proceed in parallel;
+# - an idempotency key (per customer) returns the original response on retry
+#   instead of creating a second loan;
+# - loan inserts, feature-table rows and idempotency records are queued to a
+#   single committer thread that writes whatever has accumulated in one
+#   SQLite transaction (group commit); callers wait for their batch.
+import calendar
+import itertools
+import json
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from datetime import date
+
+from clock import SystemClock
+from credit_scoring import calculate_emi, check_eligibility_from_features
+from feature_table import EMPTY_FEATURES
+
+DEFAULT_LOCK_STRIPES = 64
+DEFAULT_MAX_BATCH = 256
+DEFAULT_COMMIT_INTERVAL = 0.002  # seconds to wait for more work before committing
+
+LOAN_SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS loans ('
+    ' loan_id INTEGER PRIMARY KEY,'
+    ' customer_id INTEGER NOT NULL,'
+    ' loan_amount REAL NOT NULL,'
+    ' tenure INTEGER NOT NULL,'
+    ' interest_rate REAL NOT NULL,'
+    ' monthly_payment REAL NOT NULL,'
+    ' emis_paid_on_time INTEGER NOT NULL,'
+    ' date_of_approval TEXT NOT NULL,'
+    ' end_date TEXT NOT NULL)',
+    # Closed loans folded into loan_summaries by compaction (tasks.py); kept
+    # for audit and for re-scoring at past dates
+    'CREATE TABLE IF NOT EXISTS loans_archive ('
+    ' loan_id INTEGER PRIMARY KEY,'
+    ' customer_id INTEGER NOT NULL,'
+    ' loan_amount REAL NOT NULL,'
+    ' tenure INTEGER NOT NULL,'
+    ' interest_rate REAL NOT NULL,'
+    ' monthly_payment REAL NOT NULL,'
+    ' emis_paid_on_time INTEGER NOT NULL,'
+    ' date_of_approval TEXT NOT NULL,'
+    ' end_date TEXT NOT NULL,'
+    ' compacted_as_of TEXT NOT NULL)',
+    'CREATE TABLE IF NOT EXISTS loan_summaries ('
+    ' customer_id INTEGER PRIMARY KEY,'
+    ' loan_count INTEGER NOT NULL,'
+    ' payment_ratio_sum REAL NOT NULL,'
+    ' loan_volume REAL NOT NULL,'
+    ' compacted_as_of TEXT NOT NULL)',
+    'CREATE TABLE IF NOT EXISTS idempotency_keys ('
+    ' customer_id INTEGER NOT NULL,'
+    ' key TEXT NOT NULL,'
+    ' response TEXT NOT NULL,'
+    ' PRIMARY KEY (customer_id, key))',
+    # Change counters, e.g. FEATURES_VERSION (dashboards.py keys artifacts on them)
+    'CREATE TABLE IF NOT EXISTS data_versions ('
+    ' key TEXT PRIMARY KEY,'
+    ' version INTEGER NOT NULL)',
+]
+
+FEATURES_VERSION = 'features_version'  # data_versions key bumped when customer_features changes
+
+
+def data_version(conn, key):
+    """
+    Current value of a data_versions counter (0 if never bumped)
+    """
+    row = conn.execute('SELECT version FROM data_versions WHERE key = ?', (key,)).fetchone()
+    return row[0] if row else 0
+
+
+def bump_data_version(conn, key):
+    """
+    Increment a data_versions counter inside the caller's transaction (no commit here)
+    """
+    conn.execute(
+        'INSERT INTO data_versions VALUES (?, 1)'
+        ' ON CONFLICT(key) DO UPDATE SET version = version + 1', (key,)
+    )
+
+
+class ServiceUnavailable(Exception):
+    """
+    A group commit failed; in-memory state can no longer be trusted
+    """
+
+
+def add_months(start, months):
+    """
+    Same day `months` later, clamped to the end of shorter months
+    """
+    month_index = start.month - 1 + months
+    year, month = start.year + month_index // 12, month_index % 12 + 1
+    return date(year, month, min(start.day, calendar.monthrange(year, month)[1]))
+
+
+class _Write:
+    """
+    One request's share of a group commit
+    """
+    __slots__ = ('customer_id', 'key', 'response', 'loan', 'features', 'future')
+
+    def __init__(self, customer_id, key, response, loan, features):
+        self.customer_id = customer_id
+        self.key = key
+        self.response = response
+        self.loan = loan
+        self.features = features
+        self.future = Future()
+
+
+class LoanService:
+    """
+    Create loans against a FeatureTable (whose SQLite file also holds loans)
+    """
+
+    def __init__(self, feature_table, customers, clock=None,
+                 lock_stripes=DEFAULT_LOCK_STRIPES, max_batch=DEFAULT_MAX_BATCH,
+                 commit_interval=DEFAULT_COMMIT_INTERVAL, monitor=None, loan_ids=None):
+        self.table = feature_table
+        self.customers = customers  # customer_id -> {'Monthly Salary', 'Approved Limit', ...}
+        self.clock = clock or SystemClock()
+        self.locks = [threading.Lock() for _ in range(lock_stripes)]
+        self.max_batch = max_batch
+        self.commit_interval = commit_interval
+        self.monitor = monitor  # e.g. monitoring.DecisionMonitor
+
+        conn = self.table.conn
+        with conn:
+            for statement in LOAN_SCHEMA:
+                conn.execute(statement)
+
+        self.features = self.table.rows()
+        self.responses = {
+            (customer_id, key): json.loads(response)
+            for customer_id, key, response in conn.execute(
+                'SELECT customer_id, key, response FROM idempotency_keys'
+            )
+        }
+        if loan_ids is None:
+            last_loan_id = conn.execute(
+                'SELECT MAX(loan_id) FROM (SELECT loan_id FROM loans'
+                ' UNION ALL SELECT loan_id FROM loans_archive)'
+            ).fetchone()[0]
+            loan_ids = itertools.count((last_loan_id or 0) + 1)
+        self.loan_ids = loan_ids  # shared across shards by sharding.ShardedLoanService
+
+        # Request threads never touch the connection; only the committer does
+        self.as_of_year = self.table.built_as_of().year
+
+        self.pending = {}  # (customer_id, key) -> Future of an uncommitted response
+        self.failure = None
+        self.batches = 0
+        self.committed = 0
+        self.writes = queue.Queue()
+        self.committer = threading.Thread(target=self._commit_loop, daemon=True)
+        self.committer.start()
+
+    def _lock_for(self, customer_id):
+        return self.locks[hash(customer_id) % len(self.locks)]
+
+    def create_loan(self, customer_id, loan_amount, interest_rate, tenure, idempotency_key=None):
+        """
+        Eligibility check + loan creation; returns the /create-loan response
+        """
+        if self.failure is not None:
+            raise ServiceUnavailable('Loan store failed to commit') from self.failure
+        customer = self.customers.get(customer_id)
+        if customer is None:
+            return {'loan_id': None, 'customer_id': customer_id, 'loan_approved': False,
+                    'message': 'Customer not found', 'monthly_installment': 0}
+
+        key = idempotency_key
+        with self._lock_for(customer_id):
+            if (customer_id, key) in self.responses:
+                return self.responses[(customer_id, key)]
+            # A retry of a request that is still being committed waits for it
+            future = self.pending.get((customer_id, key)) if key is not None else None
+            if future is None:
+                future = self._decide(customer_id, customer, loan_amount,
+                                      interest_rate, tenure, key)
+
+        return future.result()
+
+    def _decide(self, customer_id, customer, loan_amount, interest_rate, tenure, key):
+        """
+        Runs under the customer's lock: check, reserve, enqueue the write
+        """
+        features = self.features.get(customer_id, EMPTY_FEATURES)
+        eligibility = check_eligibility_from_features(
+            customer_id, customer, features, loan_amount, interest_rate, tenure,
+            on_decision=self.monitor.observe if self.monitor else None
+        )
+        response = {
+            'loan_id': None,
+            'customer_id': customer_id,
+            'loan_approved': eligibility['approval'],
+            'message': eligibility['message'],
+            'monthly_installment': eligibility['monthly_installment'],
+        }
+
+        loan = None
+        if response['loan_approved']:
+            approved_on = self.clock.today()
+            monthly_payment = calculate_emi(loan_amount, eligibility['corrected_interest_rate'], tenure)
+            loan = (next(self.loan_ids), customer_id, loan_amount, tenure,
+                    eligibility['corrected_interest_rate'], monthly_payment, 0,
+                    approved_on.isoformat(), add_months(approved_on, tenure).isoformat())
+            response['loan_id'] = loan[0]
+
+            features = dict(features)
+            features['loan_count'] += 1
+            features['current_year_loans'] += int(approved_on.year == self.as_of_year)
+            features['active_debt'] += loan_amount
+            features['active_emi_sum'] += monthly_payment
+            self.features[customer_id] = features
+
+        write = _Write(customer_id, key, response, loan, features if loan else None)
+        if loan is None and key is None:
+            # Rejections without a key need no durable write
+            write.future.set_result(response)
+            return write.future
+
+        if key is not None:
+            self.pending[(customer_id, key)] = write.future
+        self.writes.put(write)
+        return write.future
+
+    def _commit_loop(self):
+        while True:
+            write = self.writes.get()
+            if write is None:
+                return
+            batch = [write]
+            deadline = time.monotonic() + self.commit_interval
+            stop = False
+            while len(batch) < self.max_batch:
+                try:
+                    write = self.writes.get(timeout=max(0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if write is None:
+                    stop = True
+                    break
+                batch.append(write)
+
+            self._commit(batch)
+            if stop:
+                return
+
+    def _commit(self, batch):
+        conn = self.table.conn
+        try:
+            with conn:
+                conn.executemany(
+                    'INSERT INTO loans VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    [w.loan for w in batch if w.loan is not None]
+                )
+                # Later writes for the same customer carry the newer row
+                latest = {w.customer_id: w.features for w in batch if w.features is not None}
+                self.table.put_many(latest.items())
+                if latest:
+                    bump_data_version(conn, FEATURES_VERSION)
+                conn.executemany(
+                    'INSERT INTO idempotency_keys VALUES (?, ?, ?)',
+                    [(w.customer_id, w.key, json.dumps(w.response))
+                     for w in batch if w.key is not None]
+                )
+        except sqlite3.Error as exc:
+            self.failure = exc
+            for w in batch:
+                w.future.set_exception(ServiceUnavailable('Loan store failed to commit'))
+            return
+
+        self.batches += 1
+        self.committed += len(batch)
+        for w in batch:
+            if w.key is not None:
+                with self._lock_for(w.customer_id):
+                    self.responses[(w.customer_id, w.key)] = w.response
+                    self.pending.pop((w.customer_id, w.key), None)
+            w.future.set_result(w.response)
+
+    def close(self):
+        """
+        Flush pending writes and stop the committer thread
+        """
+        self.writes.put(None)
+        self.committer.join()
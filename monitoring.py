@@ -0,0 +1,205 @@
+# Online monitoring of eligibility decisions
+#
+# Score and tier drift are watched as traffic flows instead of re-scoring the
+# whole book on every dashboard refresh. Each decision updates, in O(1):
+#   - a fixed-bucket histogram of credit scores over 0-100
+#   - counts per approval tier (see credit_scoring.approval_tier)
+#   - a relative-error quantile sketch (DDSketch-style log buckets) of the
+#     EMI-to-income ratio
+# All three merge by adding counts, so per-process snapshots (JSON) can be
+# combined into one view across API / worker processes.
+#
+# Usage: python monitoring.py merge snapshots/*.json
+import json
+import math
+import threading
+
+from credit_scoring import approval_tier
+
+SNAPSHOT_VERSION = 1
+
+
+class FixedHistogram:
+    """
+    Equal-width buckets over [low, high]; values outside are clamped
+    """
+
+    def __init__(self, low=0, high=100, bucket_width=5):
+        self.low = low
+        self.high = high
+        self.bucket_width = bucket_width
+        self.counts = [0] * (int((high - low) // bucket_width) + 1)
+
+    def add(self, value):
+        index = int((min(max(value, self.low), self.high) - self.low) // self.bucket_width)
+        self.counts[index] += 1
+
+    def merge(self, other):
+        if (other.low, other.high, other.bucket_width) != (self.low, self.high, self.bucket_width):
+            raise ValueError('Cannot merge histograms with different buckets')
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+
+    def to_dict(self):
+        return {'low': self.low, 'high': self.high, 'bucket_width': self.bucket_width,
+                'counts': list(self.counts)}
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls(data['low'], data['high'], data['bucket_width'])
+        histogram.counts = list(data['counts'])
+        return histogram
+
+
+class QuantileSketch:
+    """
+    Quantiles of non-negative values with bounded relative error
+    (value buckets grow geometrically by gamma = (1 + a) / (1 - a))
+    """
+
+    def __init__(self, relative_accuracy=0.01, min_value=1e-9):
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.buckets = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, value):
+        self.count += 1
+        if value <= self.min_value:
+            self.zero_count += 1
+            return
+        index = math.ceil(math.log(value) / self.log_gamma)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def merge(self, other):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError('Cannot merge sketches with different accuracy')
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def quantile(self, q):
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                return 2 * self.gamma ** index / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+    def to_dict(self):
+        return {'relative_accuracy': self.relative_accuracy, 'min_value': self.min_value,
+                'zero_count': self.zero_count, 'count': self.count,
+                'buckets': {str(index): count for index, count in self.buckets.items()}}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['relative_accuracy'], data['min_value'])
+        sketch.buckets = {int(index): count for index, count in data['buckets'].items()}
+        sketch.zero_count = data['zero_count']
+        sketch.count = data['count']
+        return sketch
+
+
+class DecisionMonitor:
+    """
+    Thread-safe collection of the sketches; `observe` plugs into
+    credit_scoring.eligibility_decision(on_decision=...)
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.scores = FixedHistogram()
+        self.tiers = {}
+        self.emi_to_income = QuantileSketch()
+        self.decisions = 0
+        self.approvals = 0
+
+    def observe(self, credit_score, result, emi_ratio=None):
+        tier = approval_tier(credit_score)
+        with self.lock:
+            self.decisions += 1
+            self.approvals += bool(result['approval'])
+            self.scores.add(credit_score)
+            self.tiers[tier] = self.tiers.get(tier, 0) + 1
+            if emi_ratio is not None:
+                self.emi_to_income.add(emi_ratio)
+
+    def merge(self, other):
+        with self.lock:
+            self.decisions += other.decisions
+            self.approvals += other.approvals
+            self.scores.merge(other.scores)
+            for tier, count in other.tiers.items():
+                self.tiers[tier] = self.tiers.get(tier, 0) + count
+            self.emi_to_income.merge(other.emi_to_income)
+        return self
+
+    def snapshot(self):
+        """
+        JSON-serializable state, loadable with from_snapshot() and mergeable
+        """
+        with self.lock:
+            return {
+                'version': SNAPSHOT_VERSION,
+                'decisions': self.decisions,
+                'approvals': self.approvals,
+                'scores': self.scores.to_dict(),
+                'tiers': dict(self.tiers),
+                'emi_to_income': self.emi_to_income.to_dict(),
+                'emi_to_income_quantiles': {
+                    str(q): self.emi_to_income.quantile(q) for q in (0.5, 0.9, 0.99)
+                },
+            }
+
+    @classmethod
+    def from_snapshot(cls, data):
+        if data.get('version') != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version: {data.get('version')}")
+        monitor = cls()
+        monitor.decisions = data['decisions']
+        monitor.approvals = data['approvals']
+        monitor.scores = FixedHistogram.from_dict(data['scores'])
+        monitor.tiers = dict(data['tiers'])
+        monitor.emi_to_income = QuantileSketch.from_dict(data['emi_to_income'])
+        return monitor
+
+    def write_snapshot(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.snapshot(), f)
+
+
+def merge_snapshots(paths):
+    merged = DecisionMonitor()
+    for path in paths:
+        with open(path) as f:
+            merged.merge(DecisionMonitor.from_snapshot(json.load(f)))
+    return merged
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Merge per-process monitoring snapshots')
+    parser.add_argument('command', choices=['merge'])
+    parser.add_argument('snapshots', nargs='+')
+    parser.add_argument('--out', help='write the merged snapshot here')
+    args = parser.parse_args()
+
+    merged = merge_snapshots(args.snapshots)
+    snapshot = merged.snapshot()
+    if args.out:
+        merged.write_snapshot(args.out)
+
+    print("ELIGIBILITY MONITORING SNAPSHOT")
+    print("=" * 50)
+    print(f"Decisions: {snapshot['decisions']} (approved {snapshot['approvals']})")
+    print(f"Approval tiers: {snapshot['tiers']}")
+    print(f"EMI-to-income quantiles: {snapshot['emi_to_income_quantiles']}")
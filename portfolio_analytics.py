@@ -0,0 +1,216 @@
+# Out-of-core portfolio statistics (the metrics of script_2.py and more)
+#
+# Each loan/customer chunk is reduced to a small partial aggregate; partials
+# merge by addition, so chunks can be processed in any order or in parallel
+# and the full frames never have to be in memory. The reference date is a
+# parameter instead of script_2.py's hard-coded datetime(2025, 7, 21).
+#
+# Usage: python portfolio_analytics.py loan_data.xlsx customer_data.xlsx \
+#            --reference-date 2025-07-21 --out-dir portfolio_tables
+import argparse
+import os
+
+from loan_io import DEFAULT_CHUNKSIZE, iter_chunks
+
+RATE_BANDS = [0, 10, 12, 14, 16, 18, float('inf')]
+RATE_BAND_LABELS = ['<10%', '10-12%', '12-14%', '14-16%', '16-18%', '18%+']
+
+
+def _add(left, right):
+    """
+    Merge two partial Series/DataFrames by key (missing keys count as zero)
+    """
+    if left is None:
+        return right
+    return left.add(right, fill_value=0)
+
+
+class LoanAggregate:
+    """
+    Mergeable partial aggregate over loan rows
+    """
+
+    def __init__(self, reference_date):
+        import pandas as pd
+
+        self.reference_date = pd.Timestamp(reference_date)
+        self.loans = 0
+        self.active_loans = 0
+        self.payment_ratio_sum = 0.0
+        self.customer_loan_counts = []  # per-chunk counts, grouped once in loans_per_customer()
+        self.monthly_approvals = None
+        self.exposure_by_band = None
+
+    def update(self, chunk):
+        import pandas as pd
+
+        active = chunk['End Date'] > self.reference_date
+        payment_ratio = chunk['EMIs paid on Time'] / chunk['Tenure']
+
+        self.loans += len(chunk)
+        self.active_loans += int(active.sum())
+        self.payment_ratio_sum += float(payment_ratio.sum())
+        self.customer_loan_counts.append(chunk.groupby('Customer ID').size())
+
+        month = chunk['Date of Approval'].dt.to_period('M')
+        self.monthly_approvals = _add(
+            self.monthly_approvals,
+            chunk.groupby(month)['Loan Amount'].agg(['size', 'sum']),
+        )
+
+        band = pd.cut(chunk['Interest Rate'], RATE_BANDS, labels=RATE_BAND_LABELS, right=False)
+        active_loans = chunk[active]
+        self.exposure_by_band = _add(
+            self.exposure_by_band,
+            active_loans.groupby(band[active], observed=False).agg(
+                active_loans=('Loan Amount', 'size'),
+                exposure=('Loan Amount', 'sum'),
+                monthly_emi=('Monthly payment', 'sum'),
+            ),
+        )
+        return self
+
+    def merge(self, other):
+        if other.reference_date != self.reference_date:
+            raise ValueError('Cannot merge aggregates for different reference dates')
+        self.loans += other.loans
+        self.active_loans += other.active_loans
+        self.payment_ratio_sum += other.payment_ratio_sum
+        self.customer_loan_counts.extend(other.customer_loan_counts)
+        self.monthly_approvals = _add(self.monthly_approvals, other.monthly_approvals)
+        self.exposure_by_band = _add(self.exposure_by_band, other.exposure_by_band)
+        return self
+
+    def loans_per_customer(self):
+        """
+        Loan count per Customer ID over every chunk seen
+        """
+        import pandas as pd
+
+        if not self.customer_loan_counts:
+            return pd.Series(dtype='int64')
+        counts = pd.concat(self.customer_loan_counts)
+        return counts.groupby(level=0).sum().astype('int64')
+
+
+class CustomerAggregate:
+    """
+    Mergeable partial aggregate of approved-limit to salary ratios
+    """
+
+    def __init__(self):
+        self.customers = 0
+        self.ratio_sum = 0.0
+        self.ratio_min = float('inf')
+        self.ratio_max = float('-inf')
+        self.customer_ids = set()
+
+    def update(self, chunk):
+        ratio = chunk['Approved Limit'] / chunk['Monthly Salary']
+        self.customers += len(chunk)
+        self.ratio_sum += float(ratio.sum())
+        if len(chunk):
+            self.ratio_min = min(self.ratio_min, float(ratio.min()))
+            self.ratio_max = max(self.ratio_max, float(ratio.max()))
+        self.customer_ids.update(int(c) for c in chunk['Customer ID'])
+        return self
+
+    def merge(self, other):
+        self.customers += other.customers
+        self.ratio_sum += other.ratio_sum
+        self.ratio_min = min(self.ratio_min, other.ratio_min)
+        self.ratio_max = max(self.ratio_max, other.ratio_max)
+        self.customer_ids |= other.customer_ids
+        return self
+
+
+def portfolio_tables(loan_agg, customer_agg):
+    """
+    Final statistics as DataFrames, one per metric
+    """
+    import pandas as pd
+
+    loans_per_customer = loan_agg.loans_per_customer()
+    customers_with_loans = len(loans_per_customer)
+
+    distribution = loans_per_customer.value_counts().sort_index()
+    distribution.index.name = 'loans'
+    without_loans = len(customer_agg.customer_ids - set(int(c) for c in loans_per_customer.index))
+
+    summary = pd.DataFrame([
+        ('reference_date', loan_agg.reference_date.date().isoformat()),
+        ('total_customers', customer_agg.customers),
+        ('customers_with_loans', customers_with_loans),
+        ('customers_without_loans', without_loans),
+        ('total_loans', loan_agg.loans),
+        ('active_loans', loan_agg.active_loans),
+        ('completed_loans', loan_agg.loans - loan_agg.active_loans),
+        ('average_payment_ratio', loan_agg.payment_ratio_sum / loan_agg.loans if loan_agg.loans else None),
+        ('average_limit_to_salary', customer_agg.ratio_sum / customer_agg.customers if customer_agg.customers else None),
+        ('min_limit_to_salary', customer_agg.ratio_min),
+        ('max_limit_to_salary', customer_agg.ratio_max),
+    ], columns=['metric', 'value'])
+
+    # An empty export leaves the partial tables unset
+    monthly = loan_agg.monthly_approvals
+    if monthly is None:
+        monthly = pd.DataFrame(columns=['size', 'sum'])
+    monthly = monthly.sort_index().rename(
+        columns={'size': 'approvals', 'sum': 'approved_amount'}
+    ).astype('int64')
+    monthly.index = monthly.index.astype(str)
+    monthly.index.name = 'month'
+
+    exposure = loan_agg.exposure_by_band
+    if exposure is None:
+        exposure = pd.DataFrame(0, index=RATE_BAND_LABELS,
+                                columns=['active_loans', 'exposure', 'monthly_emi'])
+    exposure = exposure.astype('int64')
+    exposure.index.name = 'interest_rate_band'
+
+    return {
+        'summary': summary,
+        'loans_per_customer': distribution.rename('customers').to_frame(),
+        'monthly_approvals': monthly,
+        'exposure_by_rate_band': exposure,
+    }
+
+
+def portfolio_statistics(loan_path, customer_path, reference_date, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Stream both exports chunk by chunk and return the portfolio tables
+    """
+    loan_agg = LoanAggregate(reference_date)
+    for chunk in iter_chunks(loan_path, chunksize):
+        loan_agg.merge(LoanAggregate(reference_date).update(chunk))
+
+    customer_agg = CustomerAggregate()
+    for chunk in iter_chunks(customer_path, chunksize):
+        customer_agg.merge(CustomerAggregate().update(chunk))
+
+    return portfolio_tables(loan_agg, customer_agg)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Portfolio statistics over loan/customer exports')
+    parser.add_argument('loans')
+    parser.add_argument('customers')
+    parser.add_argument('--reference-date', required=True, help='YYYY-MM-DD')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument('--out-dir', help='write each table as CSV into this directory')
+    args = parser.parse_args(argv)
+
+    tables = portfolio_statistics(args.loans, args.customers, args.reference_date, args.chunksize)
+
+    print("PORTFOLIO STATISTICS")
+    print("=" * 50)
+    for name, table in tables.items():
+        print(f"\n{name}:")
+        print(table.to_string())
+        if args.out_dir:
+            os.makedirs(args.out_dir, exist_ok=True)
+            table.to_csv(os.path.join(args.out_dir, f'{name}.csv'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+# Slim runtime entry point for API / worker processes
+#
+# Imports only the scoring core and the stdlib, so process start-up does not
+# pay for pandas / numpy / plotly (see bench_startup.py). Eligibility is
+# answered from the materialized feature table; pandas is only loaded if a
+# code path that needs it (e.g. FeatureTable.rebuild) is actually hit.
+#
+# Usage: python runtime.py --features-db features.db < requests.jsonl
+# Each input line is a JSON object:
+#   {"customer_id": 1, "customer": {"Monthly Salary": ..., "Approved Limit": ...},
+#    "loan_amount": 500000, "interest_rate": 10.5, "tenure": 60}
+# With --monitor-snapshot, score / tier / EMI-to-income sketches of every
+# decision are written there on exit (merge with `python monitoring.py merge`).
+import argparse
+import json
+import os
+import sys
+
+from credit_scoring import check_eligibility_from_features
+from feature_table import FeatureTable
+from monitoring import DecisionMonitor
+
+
+def handle_request(request, table, monitor=None):
+    """
+    One eligibility request -> result dict
+    """
+    customer_id = request['customer_id']
+    return check_eligibility_from_features(
+        customer_id,
+        request['customer'],
+        table.get(customer_id),
+        request['loan_amount'],
+        request['interest_rate'],
+        request['tenure'],
+        on_decision=monitor.observe if monitor else None,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Answer eligibility requests (JSON lines)')
+    parser.add_argument('--features-db', default='features.db')
+    parser.add_argument('--monitor-snapshot', help='write decision sketches here on exit')
+    args = parser.parse_args(argv)
+
+    # Opening a missing path would create an empty table, and every customer
+    # would then score as new and be approved
+    if not os.path.exists(args.features_db):
+        parser.error(f'feature table not found: {args.features_db}')
+    table = FeatureTable(args.features_db)
+    if table.as_of is None:
+        parser.error(f'feature table has not been built: {args.features_db}')
+    monitor = DecisionMonitor()
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            result = handle_request(json.loads(line), table, monitor)
+        except (KeyError, TypeError, ValueError) as exc:
+            result = {'error': f'Invalid request: {exc}'}
+        print(json.dumps(result), flush=True)
+
+    if args.monitor_snapshot:
+        monitor.write_snapshot(args.monitor_snapshot)
+
+
+if __name__ == '__main__':
+    main()
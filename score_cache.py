@@ -0,0 +1,66 @@
+# Bounded cache of credit scores
+#
+# Scoring is deterministic for a given (customer state, as-of date) once the
+# clock is injected (see clock.py), so scores can be reused across requests
+# and batch runs. Customer state is the feature-table row plus the approved
+# limit; any loan event changes the row and therefore the key. Entries are
+# credit_scoring.ScoreBreakdown tuples, so explaining a score is a cache hit.
+# One cache can be shared by server threads; scoring itself runs unlocked.
+import threading
+from collections import OrderedDict
+
+from clock import to_date
+
+DEFAULT_MAXSIZE = 100_000
+
+
+def score_key(customer_id, features, approved_limit, as_of):
+    """
+    Cache key for one customer's score on a given as-of date
+    """
+    return (
+        customer_id,
+        tuple(sorted(features.items())),
+        approved_limit,
+        to_date(as_of).isoformat(),
+    )
+
+
+class ScoreCache:
+    """
+    LRU mapping of score_key(...) -> ScoreBreakdown
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def __len__(self):
+        return len(self.entries)
@@ -12,8 +12,9 @@ print("\nLoans per customer distribution:")
 print(loans_per_customer.value_counts().sort_index())
 
 # Current debt analysis (assuming ongoing loans)
-from datetime import datetime
-current_date = datetime(2025, 7, 21)  # Current date as per prompt
+from clock import FixedClock
+clock = FixedClock('2025-07-21')  # Current date as per prompt
+current_date = pd.Timestamp(clock.today())
 loan_data['Date of Approval'] = pd.to_datetime(loan_data['Date of Approval'])
 loan_data['End Date'] = pd.to_datetime(loan_data['End Date'])
 
@@ -94,8 +94,10 @@ TECHNICAL IMPLEMENTATION PLAN
 
 print(implementation_plan)
 
+from clock import SystemClock
+
 # Create credit scoring function example
-def calculate_credit_score(customer_id, loan_data_df):
+def calculate_credit_score(customer_id, loan_data_df, as_of):
     """
     Example implementation of credit scoring algorithm
     """
@@ -131,7 +133,7 @@ def calculate_credit_score(customer_id, loan_data_df):
         loan_count_score = 40
     
     # Component 3: Current year activity (20% weight)
-    current_year = 2025
+    current_year = as_of.year
     current_year_loans = customer_loans[
         pd.to_datetime(customer_loans['Date of Approval']).dt.year == current_year
     ]
@@ -157,7 +159,7 @@ def calculate_credit_score(customer_id, loan_data_df):
     return round(credit_score)
 
 # Test the function
-test_score = calculate_credit_score(1, loan_data)
+test_score = calculate_credit_score(1, loan_data, SystemClock().today())
 print(f"\n5. EXAMPLE CREDIT SCORE CALCULATION")
 print(f"   Customer 1 credit score: {test_score}")
 
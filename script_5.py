@@ -2,11 +2,14 @@
 import pandas as pd
 import numpy as np
 
+from clock import SystemClock
+
 # Sample credit scoring algorithm implementation
-def calculate_credit_score(customer_data, loan_history):
+def calculate_credit_score(customer_data, loan_history, as_of):
     """
     Comprehensive credit scoring algorithm based on assignment requirements
     """
+    as_of = pd.Timestamp(as_of)
     
     # Initialize base score
     base_score = 300  # Minimum credit score
@@ -32,7 +35,7 @@ def calculate_credit_score(customer_data, loan_history):
             payment_score = 30
     
     # Component 2: Credit Utilization (30% weight)
-    current_active_loans = loan_history[loan_history['End Date'] > pd.Timestamp.now()]
+    current_active_loans = loan_history[loan_history['End Date'] > as_of]
     if len(current_active_loans) == 0:
         utilization_score = 100
     else:
@@ -62,7 +65,7 @@ def calculate_credit_score(customer_data, loan_history):
         loan_count_score = 50
     
     # Component 4: Current Year Activity (10% weight)
-    current_year = 2025
+    current_year = as_of.year
     current_year_loans = loan_history[
         pd.to_datetime(loan_history['Date of Approval']).dt.year == current_year
     ]
@@ -135,6 +138,9 @@ def calculate_emi(principal, annual_rate, tenure_months):
 print("Credit Scoring Algorithm & EMI Calculator Examples")
 print("=" * 60)
 
+# Scoring date, read once for the whole run
+as_of = SystemClock().today()
+
 # Sample customer data
 sample_customer = {
     'Customer ID': 1,
@@ -147,7 +153,7 @@ sample_customer = {
 empty_loan_history = pd.DataFrame()
 
 # Calculate credit score for new customer
-new_customer_score = calculate_credit_score(sample_customer, empty_loan_history)
+new_customer_score = calculate_credit_score(sample_customer, empty_loan_history, as_of)
 print(f"New Customer Credit Score: {new_customer_score}")
 
 # Sample with loan history
@@ -164,7 +170,7 @@ loan_history_sample = pd.DataFrame({
 loan_history_sample['Date of Approval'] = pd.to_datetime(loan_history_sample['Date of Approval'])
 loan_history_sample['End Date'] = pd.to_datetime(loan_history_sample['End Date'])
 
-experienced_customer_score = calculate_credit_score(sample_customer, loan_history_sample)
+experienced_customer_score = calculate_credit_score(sample_customer, loan_history_sample, as_of)
 print(f"Experienced Customer Credit Score: {experienced_customer_score}")
 
 # EMI Calculations
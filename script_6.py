@@ -2,10 +2,13 @@
 import pandas as pd
 import numpy as np
 
-def calculate_credit_score(customer_data, loan_history):
+from clock import SystemClock
+
+def calculate_credit_score(customer_data, loan_history, as_of):
     """
     Comprehensive credit scoring algorithm based on assignment requirements
     """
+    as_of = pd.Timestamp(as_of)
     
     # Initialize base score
     base_score = 300  # Minimum credit score
@@ -34,7 +37,7 @@ def calculate_credit_score(customer_data, loan_history):
     if len(loan_history) == 0 or 'End Date' not in loan_history.columns:
         utilization_score = 100  # New customer
     else:
-        current_active_loans = loan_history[loan_history['End Date'] > pd.Timestamp.now()]
+        current_active_loans = loan_history[loan_history['End Date'] > as_of]
         if len(current_active_loans) == 0:
             utilization_score = 100
         else:
@@ -67,7 +70,7 @@ def calculate_credit_score(customer_data, loan_history):
     if len(loan_history) == 0 or 'Date of Approval' not in loan_history.columns:
         activity_score = 100  # New customer
     else:
-        current_year = 2025
+        current_year = as_of.year
         loan_approval_dates = pd.to_datetime(loan_history['Date of Approval'])
         current_year_loans = loan_history[loan_approval_dates.dt.year == current_year]
         
@@ -153,6 +156,9 @@ def get_corrected_interest_rate(credit_score, requested_rate):
 print("CREDIT APPROVAL SYSTEM - ALGORITHM IMPLEMENTATION")
 print("=" * 70)
 
+# Scoring date, read once for the whole run
+as_of = SystemClock().today()
+
 # Sample customer data
 sample_customer = {
     'Customer ID': 1,
@@ -163,7 +169,7 @@ sample_customer = {
 
 # Test with new customer (no loan history)
 empty_loan_history = pd.DataFrame()
-new_customer_score = calculate_credit_score(sample_customer, empty_loan_history)
+new_customer_score = calculate_credit_score(sample_customer, empty_loan_history, as_of)
 print(f"New Customer Credit Score: {new_customer_score}")
 
 # Test with experienced customer
@@ -180,7 +186,7 @@ loan_history_sample = pd.DataFrame({
 loan_history_sample['Date of Approval'] = pd.to_datetime(loan_history_sample['Date of Approval'])
 loan_history_sample['End Date'] = pd.to_datetime(loan_history_sample['End Date'])
 
-experienced_customer_score = calculate_credit_score(sample_customer, loan_history_sample)
+experienced_customer_score = calculate_credit_score(sample_customer, loan_history_sample, as_of)
 print(f"Experienced Customer Credit Score: {experienced_customer_score}")
 
 print(f"\nEMI CALCULATION EXAMPLES:")
@@ -1,98 +1,17 @@
 # Corrected credit scoring to match assignment requirements (0-100 scale)
-def calculate_credit_score_assignment(customer_data, loan_history):
-    """
-    Credit scoring algorithm matching exact assignment requirements (0-100 scale)
-    """
-    
-    # Component 1: Payment History (40% weight as per assignment priority)
-    if len(loan_history) == 0:
-        payment_score = 85  # New customer gets decent score
-    else:
-        # Calculate average payment ratio across all loans
-        payment_ratios = loan_history['EMIs paid on Time'] / loan_history['Tenure']
-        avg_payment_ratio = payment_ratios.mean()
-        
-        if avg_payment_ratio >= 1.0:
-            payment_score = 100
-        elif avg_payment_ratio >= 0.9:
-            payment_score = 80
-        elif avg_payment_ratio >= 0.8:
-            payment_score = 60
-        elif avg_payment_ratio >= 0.7:
-            payment_score = 40
-        else:
-            payment_score = 20
-    
-    # Component 2: Number of loans taken in past (20% weight)
-    total_loans = len(loan_history)
-    if total_loans == 0:
-        loan_count_score = 100  # New customer
-    elif total_loans <= 2:
-        loan_count_score = 100
-    elif total_loans <= 4:
-        loan_count_score = 80
-    elif total_loans <= 6:
-        loan_count_score = 60
-    else:
-        loan_count_score = 40
-    
-    # Component 3: Loan activity in current year (20% weight)
-    if len(loan_history) == 0 or 'Date of Approval' not in loan_history.columns:
-        activity_score = 100  # New customer
-    else:
-        current_year = 2025
-        loan_approval_dates = pd.to_datetime(loan_history['Date of Approval'])
-        current_year_loans = loan_history[loan_approval_dates.dt.year == current_year]
-        
-        if len(current_year_loans) == 0:
-            activity_score = 100
-        elif len(current_year_loans) == 1:
-            activity_score = 80
-        elif len(current_year_loans) == 2:
-            activity_score = 60
-        else:
-            activity_score = 40
-    
-    # Component 4: Loan approved volume (20% weight)
-    if len(loan_history) == 0 or 'End Date' not in loan_history.columns:
-        volume_score = 100  # New customer
-    else:
-        current_active_loans = loan_history[loan_history['End Date'] > pd.Timestamp.now()]
-        if len(current_active_loans) == 0:
-            volume_score = 100
-        else:
-            total_current_debt = current_active_loans['Loan Amount'].sum()
-            approved_limit = customer_data['Approved Limit']
-            
-            # Special rule: If current loans > approved limit, credit score = 0
-            if total_current_debt > approved_limit:
-                return 0
-            
-            utilization_ratio = total_current_debt / approved_limit
-            
-            if utilization_ratio <= 0.3:
-                volume_score = 100
-            elif utilization_ratio <= 0.5:
-                volume_score = 80
-            elif utilization_ratio <= 0.7:
-                volume_score = 60
-            else:
-                volume_score = 40
-    
-    # Calculate weighted credit score (0-100 scale)
-    credit_score = (
-        payment_score * 0.4 +
-        loan_count_score * 0.2 +
-        activity_score * 0.2 +
-        volume_score * 0.2
-    )
-    
-    return round(credit_score)
+from clock import SystemClock
+from credit_scoring import (
+    calculate_credit_score_assignment, calculate_emi, check_loan_eligibility,
+    validate_emi_to_income,
+)
 
 # Test the corrected scoring function
 print("CORRECTED CREDIT SCORING (Assignment Requirements)")
 print("=" * 70)
 
+# Read the clock once for the whole run
+as_of = SystemClock().today()
+
 # Test scenarios
 test_customers = [
     {'Customer ID': 1, 'Age': 35, 'Monthly Salary': 150000, 'Approved Limit': 5000000},
@@ -134,7 +53,7 @@ for scenario_name, loan_hist in scenarios:
         loan_hist['Date of Approval'] = pd.to_datetime(loan_hist['Date of Approval'])
         loan_hist['End Date'] = pd.to_datetime(loan_hist['End Date'])
     
-    score = calculate_credit_score_assignment(test_customers[0], loan_hist)
+    score = calculate_credit_score_assignment(test_customers[0], loan_hist, as_of)
     print(f"{scenario_name}: Credit Score = {score}")
     
     # Apply approval rules
@@ -156,21 +75,6 @@ for scenario_name, loan_hist in scenarios:
     print()
 
 # EMI to Income ratio validation
-def validate_emi_to_income(monthly_salary, new_emi, existing_emis=0):
-    """
-    Check if total EMIs exceed 50% of monthly salary
-    """
-    total_emis = new_emi + existing_emis
-    max_allowed = monthly_salary * 0.5
-    ratio = (total_emis / monthly_salary) * 100
-    
-    return {
-        'total_emis': total_emis,
-        'max_allowed': max_allowed,
-        'ratio_percentage': round(ratio, 2),
-        'approved': total_emis <= max_allowed
-    }
-
 print("EMI TO INCOME RATIO VALIDATION:")
 print("-" * 40)
 
@@ -201,65 +105,6 @@ for existing_emi, description in test_cases:
 print("COMPLETE LOAN ELIGIBILITY CHECK PROCESS:")
 print("-" * 50)
 
-def check_loan_eligibility(customer_id, customer_data, loan_history, 
-                         requested_amount, requested_rate, tenure):
-    """
-    Complete loan eligibility check as per assignment
-    """
-    result = {
-        'customer_id': customer_id,
-        'approval': False,
-        'interest_rate': requested_rate,
-        'corrected_interest_rate': requested_rate,
-        'tenure': tenure,
-        'monthly_installment': 0,
-        'message': ''
-    }
-    
-    # Step 1: Calculate credit score
-    credit_score = calculate_credit_score_assignment(customer_data, loan_history)
-    
-    # Step 2: Check special rejection conditions
-    if credit_score == 0:
-        result['message'] = 'Current loans exceed approved limit'
-        return result
-    
-    if credit_score <= 10:
-        result['message'] = 'Credit score too low (≤10)'
-        return result
-    
-    # Step 3: Calculate EMI for new loan
-    if 30 < credit_score <= 50:
-        corrected_rate = max(requested_rate, 12.0)
-    elif 10 < credit_score <= 30:
-        corrected_rate = max(requested_rate, 16.0)
-    else:
-        corrected_rate = requested_rate
-    
-    result['corrected_interest_rate'] = corrected_rate
-    monthly_emi = calculate_emi(requested_amount, corrected_rate, tenure)
-    result['monthly_installment'] = monthly_emi
-    
-    # Step 4: Check EMI to income ratio
-    # Calculate existing EMIs (simplified - would need current active loans)
-    existing_emis = 0  # In real implementation, calculate from active loans
-    
-    emi_validation = validate_emi_to_income(
-        customer_data['Monthly Salary'], 
-        monthly_emi, 
-        existing_emis
-    )
-    
-    if not emi_validation['approved']:
-        result['message'] = f'Total EMIs ({emi_validation["ratio_percentage"]}%) exceed 50% of monthly income'
-        return result
-    
-    # If we reach here, loan is approved
-    result['approval'] = True
-    result['message'] = 'Loan approved'
-    
-    return result
-
 # Test complete eligibility check
 test_loan_request = {
     'customer_id': 1,
@@ -267,7 +112,8 @@ test_loan_request = {
     'loan_history': scenarios[1][1],  # Good payment history
     'requested_amount': 500000,
     'requested_rate': 10.5,
-    'tenure': 60
+    'tenure': 60,
+    'as_of': as_of
 }
 
 eligibility_result = check_loan_eligibility(**test_loan_request)
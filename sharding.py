@@ -0,0 +1,363 @@
+# Customer-sharded storage: consistent hashing over local SQLite shards
+#
+# Everything keys on Customer ID (loans, features, scores, the approved-limit
+# and EMI checks), so customers are the unit of partitioning. Each shard is a
+# tasks.py data file; a hash ring with virtual nodes routes every customer to
+# one shard for ingestion and for requests. Portfolio-wide questions are
+# answered scatter-gather: each shard computes the mergeable partial
+# aggregates of portfolio_analytics.py and the partials are merged.
+#
+# Adding or removing a shard moves only the customers whose owner changes
+# (about 1/N of them). Each move copies all of a customer's rows and deletes
+# them from the source in one transaction spanning both files (ATTACH), so a
+# customer is never split or lost; an interrupted rebalance can be re-run.
+# Routing must be paused while rebalancing.
+#
+# Usage: python sharding.py --dir shards --shards 3 [--add-shard]
+import argparse
+import bisect
+import hashlib
+import itertools
+import json
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+from credit_scoring import check_eligibility_from_features
+from feature_table import EMPTY_FEATURES, FeatureTable
+from jobs import SQLiteBroker, run_workers, submit
+from loan_io import DEFAULT_CHUNKSIZE, iter_chunks
+from loan_service import LoanService
+from tasks import (
+    LOAN_FRAME_COLUMNS, connect, insert_customers, insert_loans, rebuild_features, rescore,
+)
+
+MANIFEST = 'shards.json'
+DEFAULT_VNODES = 64
+
+# Every table holding per-customer rows, moved together on rebalance
+CUSTOMER_TABLES = [
+    'customers', 'loans', 'loans_archive', 'loan_summaries', 'scores',
+    'idempotency_keys', 'customer_features',
+]
+
+
+def _point(value):
+    return int.from_bytes(hashlib.md5(str(value).encode()).digest()[:8], 'big')
+
+
+class HashRing:
+    """
+    Consistent hashing of customer IDs onto shard names
+    """
+
+    def __init__(self, shards, vnodes=DEFAULT_VNODES):
+        self.shards = list(shards)
+        self.vnodes = vnodes
+        ring = sorted((_point(f'{shard}#{i}'), shard) for shard in self.shards for i in range(vnodes))
+        self._points = [point for point, _ in ring]
+        self._owners = [shard for _, shard in ring]
+
+    def shard_for(self, customer_id):
+        index = bisect.bisect(self._points, _point(int(customer_id))) % len(self._points)
+        return self._owners[index]
+
+    def with_shard(self, shard):
+        return HashRing(self.shards + [shard], self.vnodes)
+
+    def without_shard(self, shard):
+        return HashRing([s for s in self.shards if s != shard], self.vnodes)
+
+
+class ShardedStore:
+    """
+    N tasks.py data files under one directory, routed by a HashRing
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, MANIFEST)) as f:
+            manifest = json.load(f)
+        self.ring = HashRing(manifest['shards'], manifest['vnodes'])
+
+    @classmethod
+    def create(cls, directory, shard_count, vnodes=DEFAULT_VNODES):
+        os.makedirs(directory, exist_ok=True)
+        if os.path.exists(os.path.join(directory, MANIFEST)):
+            raise FileExistsError(f'Shard manifest already exists in {directory}')
+        cls._write_manifest(directory, HashRing([f'shard-{i}' for i in range(shard_count)], vnodes))
+        return cls(directory)
+
+    @staticmethod
+    def _write_manifest(directory, ring):
+        tmp_path = os.path.join(directory, f'{MANIFEST}.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({'shards': ring.shards, 'vnodes': ring.vnodes}, f)
+        os.replace(tmp_path, os.path.join(directory, MANIFEST))
+
+    @property
+    def shards(self):
+        return self.ring.shards
+
+    def path(self, shard):
+        return os.path.join(self.directory, f'{shard}.db')
+
+    def shard_for(self, customer_id):
+        return self.ring.shard_for(customer_id)
+
+    def _split(self, chunk):
+        owners = chunk['Customer ID'].map(self.ring.shard_for)
+        return chunk.groupby(owners)
+
+    # Ingestion ---------------------------------------------------------------
+
+    def ingest(self, customer_path, loan_path, as_of, chunksize=DEFAULT_CHUNKSIZE, workers=4):
+        """
+        Route both exports to their shards, then rebuild every shard's
+        feature table in parallel jobs
+        """
+        from data_quality import IdSet
+
+        conns = {shard: connect(self.path(shard)) for shard in self.shards}
+        customers = loans = inserted = 0
+        for chunk in iter_chunks(customer_path, chunksize):
+            for shard, part in self._split(chunk):
+                customers += insert_customers(conns[shard], part)
+
+        # Loan IDs stay unique across shards: first occurrence wins, as in a
+        # single data file
+        seen = IdSet()
+        for chunk in iter_chunks(loan_path, chunksize):
+            loan_ids = chunk['Loan ID'].to_numpy()
+            first = ~(seen.contains(loan_ids) | chunk['Loan ID'].duplicated().to_numpy())
+            seen.add(loan_ids)
+            loans += len(chunk)
+            for shard, part in self._split(chunk[first]):
+                inserted += insert_loans(conns[shard], part)
+        for conn in conns.values():
+            conn.close()
+
+        self._run_per_shard(lambda shard: rebuild_features.s(self.path(shard), as_of), workers)
+        return {'customers': customers, 'loans': loans, 'inserted': inserted,
+                'skipped_duplicates': loans - inserted}
+
+    def rescore(self, workers=4):
+        self._run_per_shard(lambda shard: rescore.s(self.path(shard)), workers)
+        return self.tier_counts()
+
+    def _run_per_shard(self, signature_for, workers):
+        broker = SQLiteBroker()
+        for shard in self.shards:
+            submit(broker, signature_for(shard))
+        run_workers(broker, workers)
+
+    # Scatter-gather ------------------------------------------------------------
+
+    def scatter(self, function):
+        """
+        {shard: function(shard)}, evaluated on all shards concurrently
+        """
+        with ThreadPoolExecutor(max_workers=len(self.shards)) as pool:
+            return dict(zip(self.shards, pool.map(function, self.shards)))
+
+    def _query(self, shard, sql):
+        conn = connect(self.path(shard))
+        try:
+            return conn.execute(sql).fetchall()
+        finally:
+            conn.close()
+
+    def shard_sizes(self):
+        return self.scatter(lambda shard: {
+            'customers': self._query(shard, 'SELECT COUNT(*) FROM customers')[0][0],
+            'loans': self._query(shard, 'SELECT COUNT(*) FROM loans')[0][0],
+        })
+
+    def tier_counts(self):
+        totals = {}
+        for rows in self.scatter(lambda shard: self._query(
+                shard, 'SELECT approval_tier, COUNT(*) FROM scores GROUP BY 1')).values():
+            for tier, count in rows:
+                totals[tier] = totals.get(tier, 0) + count
+        return totals
+
+    def portfolio_statistics(self, reference_date):
+        """
+        portfolio_analytics tables over all shards (hot and archived loans)
+        """
+        import pandas as pd
+
+        from portfolio_analytics import CustomerAggregate, LoanAggregate, portfolio_tables
+
+        def partial(shard):
+            conn = connect(self.path(shard))
+            try:
+                loans = pd.read_sql_query(
+                    f'SELECT {LOAN_FRAME_COLUMNS} FROM loans'
+                    f' UNION ALL SELECT {LOAN_FRAME_COLUMNS} FROM loans_archive', conn,
+                    parse_dates=['Date of Approval', 'End Date'])
+                customers = pd.read_sql_query(
+                    'SELECT customer_id AS "Customer ID", monthly_salary AS "Monthly Salary",'
+                    ' approved_limit AS "Approved Limit" FROM customers', conn)
+            finally:
+                conn.close()
+            return (LoanAggregate(reference_date).update(loans),
+                    CustomerAggregate().update(customers))
+
+        loan_agg, customer_agg = LoanAggregate(reference_date), CustomerAggregate()
+        for loan_part, customer_part in self.scatter(partial).values():
+            loan_agg.merge(loan_part)
+            customer_agg.merge(customer_part)
+        return portfolio_tables(loan_agg, customer_agg)
+
+    # Rebalancing -----------------------------------------------------------------
+
+    def add_shard(self, shard=None):
+        shard = shard or f'shard-{len(self.shards)}'
+        while shard in self.shards:
+            shard += '-new'
+        return self._rebalance(self.ring.with_shard(shard))
+
+    def remove_shard(self, shard):
+        moved = self._rebalance(self.ring.without_shard(shard))
+        os.remove(self.path(shard))
+        return moved
+
+    def _rebalance(self, new_ring):
+        """
+        Move every customer whose owner differs under `new_ring`; returns
+        {(source, destination): customers moved}
+        """
+        for shard in new_ring.shards:
+            connect(self.path(shard)).close()
+            FeatureTable(self.path(shard)).conn.close()
+
+        moved = {}
+        for source in self.ring.shards:
+            ids = self._query(source, ' UNION '.join(
+                f'SELECT customer_id FROM {table}' for table in CUSTOMER_TABLES))
+            moves = {}
+            for (customer_id,) in ids:
+                destination = new_ring.shard_for(customer_id)
+                if destination != source:
+                    moves.setdefault(destination, []).append(customer_id)
+            for destination, customer_ids in moves.items():
+                self._move(source, destination, customer_ids)
+                moved[(source, destination)] = len(customer_ids)
+
+        self._write_manifest(self.directory, new_ring)
+        self.ring = new_ring
+        return moved
+
+    def _move(self, source, destination, customer_ids):
+        conn = sqlite3.connect(self.path(source), isolation_level=None)
+        try:
+            conn.execute('ATTACH DATABASE ? AS destination', (self.path(destination),))
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                conn.execute('CREATE TEMP TABLE moving (customer_id INTEGER PRIMARY KEY)')
+                conn.executemany('INSERT INTO moving VALUES (?)', [(c,) for c in customer_ids])
+                for table in CUSTOMER_TABLES:
+                    selection = 'WHERE customer_id IN (SELECT customer_id FROM moving)'
+                    conn.execute(f'INSERT OR REPLACE INTO destination.{table}'
+                                 f' SELECT * FROM main.{table} {selection}')
+                    conn.execute(f'DELETE FROM main.{table} {selection}')
+                # A new shard inherits the feature table's as-of date
+                conn.execute('INSERT OR IGNORE INTO destination.feature_meta'
+                             ' SELECT * FROM main.feature_meta')
+                conn.execute('DROP TABLE moving')
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+        finally:
+            conn.close()
+
+
+class ShardedLoanService:
+    """
+    Request routing: one LoanService per shard, picked by customer
+    """
+
+    def __init__(self, store, clock=None, loan_id_slot=0, loan_id_stride=1):
+        self.store = store
+        # New loan IDs are unique across shards: one counter above the largest
+        # stored ID; several router processes take disjoint slots of a stride
+        last_loan_id = max((row[0][0] or 0) for row in store.scatter(lambda shard: store._query(
+            shard, 'SELECT MAX(loan_id) FROM (SELECT loan_id FROM loans'
+                   ' UNION ALL SELECT loan_id FROM loans_archive)')).values())
+        start = last_loan_id + 1 + (loan_id_slot - last_loan_id - 1) % loan_id_stride
+        loan_ids = itertools.count(start, loan_id_stride)
+
+        self.services = {}
+        for shard in store.shards:
+            conn = connect(store.path(shard))
+            customers = {
+                customer_id: {'Customer ID': customer_id, 'Monthly Salary': monthly_salary,
+                              'Approved Limit': approved_limit}
+                for customer_id, monthly_salary, approved_limit in conn.execute(
+                    'SELECT customer_id, monthly_salary, approved_limit FROM customers')
+            }
+            conn.close()
+            self.services[shard] = LoanService(FeatureTable(store.path(shard)), customers,
+                                               clock=clock, loan_ids=loan_ids)
+
+    def service_for(self, customer_id):
+        return self.services[self.store.shard_for(customer_id)]
+
+    def check_eligibility(self, customer_id, loan_amount, interest_rate, tenure):
+        service = self.service_for(customer_id)
+        customer = service.customers.get(customer_id)
+        if customer is None:
+            return None
+        return check_eligibility_from_features(
+            customer_id, customer, service.features.get(customer_id, EMPTY_FEATURES),
+            loan_amount, interest_rate, tenure)
+
+    def create_loan(self, customer_id, loan_amount, interest_rate, tenure, idempotency_key=None):
+        return self.service_for(customer_id).create_loan(
+            customer_id, loan_amount, interest_rate, tenure, idempotency_key=idempotency_key)
+
+    def close(self):
+        for service in self.services.values():
+            service.close()
+
+
+def main(argv=None):
+    from clock import FixedClock, SystemClock
+
+    parser = argparse.ArgumentParser(description='Shard customers over local SQLite files')
+    parser.add_argument('--dir', default='shards')
+    parser.add_argument('--shards', type=int, default=3)
+    parser.add_argument('--customers', default='customer_data.xlsx')
+    parser.add_argument('--loans', default='loan_data.xlsx')
+    parser.add_argument('--as-of', help='scoring date (default: today)')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--add-shard', action='store_true', help='add one shard and rebalance')
+    args = parser.parse_args(argv)
+
+    as_of = (FixedClock(args.as_of) if args.as_of else SystemClock()).today().isoformat()
+
+    print("SHARDED CUSTOMER STORE")
+    print("=" * 50)
+    if os.path.exists(os.path.join(args.dir, MANIFEST)):
+        store = ShardedStore(args.dir)
+    else:
+        store = ShardedStore.create(args.dir, args.shards)
+        print(f"Ingestion: {store.ingest(args.customers, args.loans, as_of, workers=args.workers)}")
+        print(f"Re-score as of {as_of}: {store.rescore(args.workers)}")
+
+    if args.add_shard:
+        moved = store.add_shard()
+        print(f"Rebalanced onto {store.shards[-1]}: "
+              f"{sum(moved.values())} customers moved {dict((f'{s}->{d}', n) for (s, d), n in moved.items())}")
+
+    for shard, sizes in store.shard_sizes().items():
+        print(f"  {shard}: {sizes['customers']} customers, {sizes['loans']} loans")
+    print(f"Approval tiers (scatter-gather): {store.tier_counts()}")
+    summary = store.portfolio_statistics(as_of)['summary']
+    print(summary.to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+# Concurrency stress test for loan_service.LoanService (/create-loan)
+#
+# Many threads fire create-loan requests at a small set of customers, with a
+# share of requests retried under the same idempotency key. Afterwards the
+# committed state is checked against the invariants:
+#   - no customer's active debt exceeds the approved limit because of new loans
+#   - no customer's active EMIs exceed 50% of salary because of new loans
+#   - every idempotency key produced at most one loan, and retries got the
+#     same response as the original
+#   - the persisted feature table matches recomputation from raw loans
+# Exits non-zero if any invariant is violated.
+#
+# Usage: python stress_create_loan.py [--threads 32] [--requests 4000]
+import argparse
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+
+import pandas as pd
+
+from clock import FixedClock
+from feature_table import FeatureTable
+from loan_service import LoanService
+
+AS_OF = '2025-07-21'
+
+
+def run(threads, requests, customers_under_test, seed):
+    customer_data = pd.read_excel('customer_data.xlsx')
+    loan_data = pd.read_excel('loan_data.xlsx')
+    customers = {c['Customer ID']: c for c in customer_data.to_dict('records')}
+
+    table = FeatureTable()
+    table.rebuild(loan_data, AS_OF)
+    initial = table.rows()
+    service = LoanService(table, customers, clock=FixedClock(AS_OF))
+
+    rng = random.Random(seed)
+    hot_customers = rng.sample(sorted(customers), customers_under_test)
+    plan = []
+    for i in range(requests):
+        customer_id = rng.choice(hot_customers)
+        amount = rng.choice([100000, 200000, 300000, 500000, 800000])
+        key = f'req-{i}'
+        plan.append((customer_id, amount, rng.choice([8.5, 10.5, 14.0]), rng.choice([12, 36, 60]), key))
+        if rng.random() < 0.2:  # client retry with the same key
+            plan.append(plan[-1])
+    rng.shuffle(plan)
+
+    responses = defaultdict(list)
+    responses_lock = threading.Lock()
+    work = iter(plan)
+    work_lock = threading.Lock()
+
+    def worker():
+        while True:
+            with work_lock:
+                item = next(work, None)
+            if item is None:
+                return
+            customer_id, amount, rate, tenure, key = item
+            response = service.create_loan(customer_id, amount, rate, tenure, idempotency_key=key)
+            with responses_lock:
+                responses[(customer_id, key)].append(response)
+
+    start = time.perf_counter()
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    service.close()
+
+    failures = []
+
+    # Idempotency: identical responses per key, at most one loan per key
+    for key, seen in responses.items():
+        if any(response != seen[0] for response in seen):
+            failures.append(f'Key {key} returned different responses')
+
+    new_loans = pd.read_sql_query('SELECT * FROM loans', table.conn)
+    keyed_loan_ids = {seen[0]['loan_id'] for seen in responses.values() if seen[0]['loan_id']}
+    if set(new_loans['loan_id']) != keyed_loan_ids:
+        failures.append('Loans table does not match approved responses one-to-one')
+
+    # Limits: new loans never push a customer over the limit / EMI cap
+    for customer_id, loans in new_loans.groupby('customer_id'):
+        customer = customers[customer_id]
+        before = initial.get(customer_id, {'active_debt': 0, 'active_emi_sum': 0})
+        debt = before['active_debt'] + loans['loan_amount'].sum()
+        emis = before['active_emi_sum'] + loans['monthly_payment'].sum()
+        if debt > customer['Approved Limit']:
+            failures.append(f'Customer {customer_id}: debt {debt} > limit {customer["Approved Limit"]}')
+        if emis > customer['Monthly Salary'] * 0.5:
+            failures.append(f'Customer {customer_id}: EMIs {emis:.2f} > 50% of salary')
+
+    # Persisted aggregates agree with raw loans (original book + new loans)
+    combined = pd.concat([loan_data, pd.DataFrame({
+        'Customer ID': new_loans['customer_id'],
+        'Loan ID': new_loans['loan_id'],
+        'Loan Amount': new_loans['loan_amount'],
+        'Tenure': new_loans['tenure'],
+        'Interest Rate': new_loans['interest_rate'],
+        'Monthly payment': new_loans['monthly_payment'],
+        'EMIs paid on Time': new_loans['emis_paid_on_time'],
+        'Date of Approval': pd.to_datetime(new_loans['date_of_approval']),
+        'End Date': pd.to_datetime(new_loans['end_date']),
+    })], ignore_index=True)
+    mismatches = table.verify(combined)
+    if mismatches:
+        failures.append(f'Feature table drifted from raw loans: {mismatches[:3]}')
+
+    print("CREATE-LOAN CONCURRENCY STRESS TEST")
+    print("=" * 50)
+    print(f"Threads: {threads}, requests: {len(plan)} ({len(responses)} unique keys)")
+    print(f"Customers under test: {customers_under_test}")
+    print(f"Loans created: {len(new_loans)}")
+    print(f"Group commits: {service.batches} for {service.committed} writes")
+    print(f"Throughput: {len(plan) / elapsed:,.0f} requests/s")
+    print(f"Invariant violations: {len(failures)}")
+    for failure in failures[:10]:
+        print(f"  {failure}")
+    return not failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Stress /create-loan under concurrency')
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=4000)
+    parser.add_argument('--customers', type=int, default=10,
+                        help='number of customers the requests are spread over')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args(argv)
+    ok = run(args.threads, args.requests, args.customers, args.seed)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
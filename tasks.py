@@ -0,0 +1,397 @@
+# Background tasks: ingestion, compaction, feature-table rebuild and re-score
+#
+# All tasks work against one SQLite data file (customers, loans, feature
+# table, scores) and run on any jobs.py broker. Large steps are chunked:
+# ingestion streams the exports chunk by chunk with progress, the other steps
+# fan out one job per customer-ID range and fan in to a summary.
+#
+# Compaction moves closed loans approved before the as-of year out of the hot
+# `loans` table into `loans_archive`, folding them into one `loan_summaries`
+# row per customer. For any later as-of date such loans only add to loan count
+# and payment history, so rebuilds and scoring read the summary plus the
+# remaining active / current-year loans.
+#
+# Usage: python tasks.py --db credit.db [--workers 4] [--as-of 2025-07-21]
+#                       [--loan-book loan_book] [--compact]
+import argparse
+import sqlite3
+
+from clock import FixedClock, SystemClock, to_date
+from credit_scoring import approval_tier, score_breakdown
+from feature_table import FeatureTable, compute_customer_features
+from jobs import SQLiteBroker, run_workers, submit, task
+from loan_book import publish_loan_book
+from loan_io import DEFAULT_CHUNKSIZE, iter_chunks
+from loan_service import FEATURES_VERSION, LOAN_SCHEMA, bump_data_version, data_version
+
+CUSTOMERS_PER_JOB = 100
+
+DATA_SCHEMA = LOAN_SCHEMA + [
+    'CREATE TABLE IF NOT EXISTS customers ('
+    ' customer_id INTEGER PRIMARY KEY,'
+    ' first_name TEXT,'
+    ' last_name TEXT,'
+    ' age INTEGER,'
+    ' phone_number INTEGER,'
+    ' monthly_salary INTEGER NOT NULL,'
+    ' approved_limit INTEGER NOT NULL)',
+    'CREATE TABLE IF NOT EXISTS scores ('
+    ' customer_id INTEGER PRIMARY KEY,'
+    ' as_of TEXT NOT NULL,'
+    ' credit_score INTEGER NOT NULL,'
+    ' approval_tier TEXT NOT NULL,'
+    ' payment_score INTEGER NOT NULL,'  # ScoreBreakdown components, see credit_scoring
+    ' loan_count_score INTEGER NOT NULL,'
+    ' activity_score INTEGER NOT NULL,'
+    ' volume_score INTEGER NOT NULL,'
+    ' override TEXT)',
+]
+
+SCORES_VERSION = 'scores_version'  # data_versions key bumped per completed re-score
+
+# loans table -> loan_data.xlsx column names (what compute_customer_features expects)
+LOAN_FRAME_COLUMNS = (
+    'customer_id AS "Customer ID", loan_id AS "Loan ID", loan_amount AS "Loan Amount",'
+    ' tenure AS "Tenure", interest_rate AS "Interest Rate",'
+    ' monthly_payment AS "Monthly payment", emis_paid_on_time AS "EMIs paid on Time",'
+    ' date_of_approval AS "Date of Approval", end_date AS "End Date"'
+)
+
+
+def connect(db_path):
+    conn = sqlite3.connect(db_path, timeout=30)
+    with conn:
+        for statement in DATA_SCHEMA:
+            conn.execute(statement)
+    return conn
+
+
+def id_ranges(conn, query, size):
+    """
+    Split the sorted IDs returned by `query` into [(first, last), ...] of `size` IDs
+    """
+    ids = [row[0] for row in conn.execute(query)]
+    return [(ids[i], ids[min(i + size, len(ids)) - 1]) for i in range(0, len(ids), size)]
+
+
+# Ingestion -------------------------------------------------------------------
+
+def insert_customers(conn, chunk):
+    """
+    Upsert a customer_data chunk in one transaction
+    """
+    with conn:
+        conn.executemany(
+            'INSERT OR REPLACE INTO customers VALUES (?, ?, ?, ?, ?, ?, ?)',
+            chunk[['Customer ID', 'First Name', 'Last Name', 'Age', 'Phone Number',
+                   'Monthly Salary', 'Approved Limit']].itertuples(index=False, name=None)
+        )
+    return len(chunk)
+
+
+def insert_loans(conn, chunk):
+    """
+    Insert a loan_data chunk in one transaction; returns the rows inserted.
+    Known Loan IDs (including compacted ones) are skipped
+    """
+    records = [
+        (int(loan_id), int(customer_id), float(amount), int(tenure), float(rate),
+         float(payment), int(paid), approved.date().isoformat(), ended.date().isoformat())
+        for customer_id, loan_id, amount, tenure, rate, payment, paid, approved, ended
+        in chunk[['Customer ID', 'Loan ID', 'Loan Amount', 'Tenure', 'Interest Rate',
+                  'Monthly payment', 'EMIs paid on Time', 'Date of Approval',
+                  'End Date']].itertuples(index=False, name=None)
+    ]
+    with conn:
+        before = conn.total_changes
+        conn.executemany(
+            'INSERT OR IGNORE INTO loans SELECT ?, ?, ?, ?, ?, ?, ?, ?, ?'
+            ' WHERE NOT EXISTS (SELECT 1 FROM loans_archive WHERE loan_id = ?1)', records
+        )
+        return conn.total_changes - before
+
+
+@task('ingest')
+def ingest(ctx, db_path, customer_path, loan_path, as_of, chunksize=DEFAULT_CHUNKSIZE,
+           book_dir=None):
+    """
+    Fan out both exports, then rebuild the feature table (and publish the
+    shared loan book if `book_dir` is given)
+    """
+    connect(db_path).close()
+    return ctx.fan_out(
+        [ingest_customers.s(db_path, customer_path, chunksize),
+         ingest_loans.s(db_path, loan_path, chunksize)],
+        callback=after_ingest.s(db_path, as_of, book_dir),
+    )
+
+
+@task('ingest_customers')
+def ingest_customers(ctx, db_path, path, chunksize=DEFAULT_CHUNKSIZE):
+    conn = connect(db_path)
+    rows = 0
+    for number, chunk in enumerate(iter_chunks(path, chunksize), start=1):
+        rows += insert_customers(conn, chunk)
+        ctx.progress(number, 0, f'{rows} customers')
+    conn.close()
+    return {'customers': rows}
+
+
+@task('ingest_loans')
+def ingest_loans(ctx, db_path, path, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Duplicate Loan IDs keep the first row (see data_quality.py for the report)
+    """
+    conn = connect(db_path)
+    rows = inserted = 0
+    for number, chunk in enumerate(iter_chunks(path, chunksize), start=1):
+        inserted += insert_loans(conn, chunk)
+        rows += len(chunk)
+        ctx.progress(number, 0, f'{rows} loans')
+    conn.close()
+    return {'loans': rows, 'inserted': inserted, 'skipped_duplicates': rows - inserted}
+
+
+@task('after_ingest')
+def after_ingest(ctx, results, db_path, as_of, book_dir=None):
+    ctx.submit(rebuild_features.s(db_path, as_of))
+    if book_dir:
+        ctx.submit(publish_book.s(db_path, book_dir))
+    summary = {}
+    for result in results:
+        summary.update(result)
+    return summary
+
+
+@task('publish_book')
+def publish_book(ctx, db_path, book_dir):
+    """
+    Publish the full loan history (hot and archived loans) as the next
+    generation of the shared loan book
+    """
+    import pandas as pd
+
+    conn = connect(db_path)
+    loans = pd.read_sql_query(
+        f'SELECT {LOAN_FRAME_COLUMNS} FROM loans'
+        f' UNION ALL SELECT {LOAN_FRAME_COLUMNS} FROM loans_archive', conn,
+        parse_dates=['Date of Approval', 'End Date']
+    )
+    conn.close()
+    return {'generation': publish_loan_book(loans, book_dir), 'loans': len(loans)}
+
+
+# Feature-table rebuild ----------------------------------------------------------
+
+def check_not_compacted_after(conn, as_of):
+    """
+    Compacted loans are only summarized for as-of dates after the compaction
+    """
+    latest = conn.execute('SELECT MAX(compacted_as_of) FROM loan_summaries').fetchone()[0]
+    if latest is not None and to_date(as_of) < to_date(latest):
+        raise ValueError(f'Loans were compacted as of {latest}; features as of {as_of}'
+                         ' need the archived loans (loans_archive)')
+
+
+@task('rebuild_features')
+def rebuild_features(ctx, db_path, as_of, customers_per_job=CUSTOMERS_PER_JOB):
+    """
+    Ranges are built into the staging table; readers keep the previous rows
+    and as-of date until finish_feature_rebuild swaps the new ones in
+    """
+    conn = connect(db_path)
+    check_not_compacted_after(conn, as_of)
+    ranges = id_ranges(conn, 'SELECT customer_id FROM loans UNION'
+                             ' SELECT customer_id FROM loan_summaries ORDER BY 1',
+                       customers_per_job)
+    conn.close()
+
+    FeatureTable(db_path).start_staging()
+    return ctx.fan_out(
+        [rebuild_feature_range.s(db_path, as_of, first, last) for first, last in ranges],
+        callback=finish_feature_rebuild.s(db_path, as_of),
+    )
+
+
+@task('rebuild_feature_range')
+def rebuild_feature_range(ctx, db_path, as_of, first, last):
+    import pandas as pd
+
+    conn = connect(db_path)
+    loans = pd.read_sql_query(
+        f'SELECT {LOAN_FRAME_COLUMNS} FROM loans WHERE customer_id BETWEEN ? AND ?',
+        conn, params=(first, last), parse_dates=['Date of Approval', 'End Date']
+    )
+    compacted = pd.read_sql_query(
+        'SELECT customer_id, loan_count, payment_ratio_sum FROM loan_summaries'
+        ' WHERE customer_id BETWEEN ? AND ?', conn, params=(first, last), index_col='customer_id'
+    )
+    conn.close()
+    return FeatureTable(db_path).write(compute_customer_features(loans, as_of, compacted),
+                                       staged=True)
+
+
+@task('finish_feature_rebuild')
+def finish_feature_rebuild(ctx, results, db_path, as_of):
+    table = FeatureTable(db_path)
+    table.swap_in_staged(as_of)
+    with table.conn:
+        bump_data_version(table.conn, FEATURES_VERSION)
+    return {'feature_rows': sum(results), 'jobs': len(results)}
+
+
+# Compaction ------------------------------------------------------------------------
+
+# Loans that only count towards loan count / payment history from `as_of` on
+COMPACTABLE = 'customer_id BETWEEN ? AND ? AND end_date <= ? AND date_of_approval < ?'
+
+
+@task('compact_loans')
+def compact_loans(ctx, db_path, as_of, customers_per_job=CUSTOMERS_PER_JOB):
+    """
+    Fold closed loans approved before the as-of year into per-customer
+    summaries, archiving the raw rows
+    """
+    conn = connect(db_path)
+    check_not_compacted_after(conn, as_of)
+    ranges = id_ranges(conn, 'SELECT DISTINCT customer_id FROM loans ORDER BY customer_id',
+                       customers_per_job)
+    conn.close()
+    return ctx.fan_out(
+        [compact_loan_range.s(db_path, as_of, first, last) for first, last in ranges],
+        callback=summarize_compaction.s(),
+    )
+
+
+@task('compact_loan_range')
+def compact_loan_range(ctx, db_path, as_of, first, last):
+    as_of = to_date(as_of)
+    params = (first, last, as_of.isoformat(), as_of.replace(month=1, day=1).isoformat())
+    conn = connect(db_path)
+    with conn:  # summary, archive and delete commit together
+        conn.execute(
+            'INSERT INTO loan_summaries'
+            ' SELECT customer_id, COUNT(*), SUM(CAST(emis_paid_on_time AS REAL) / tenure),'
+            f' SUM(loan_amount), ? FROM loans WHERE {COMPACTABLE} GROUP BY customer_id'
+            ' ON CONFLICT(customer_id) DO UPDATE SET'
+            ' loan_count = loan_count + excluded.loan_count,'
+            ' payment_ratio_sum = payment_ratio_sum + excluded.payment_ratio_sum,'
+            ' loan_volume = loan_volume + excluded.loan_volume,'
+            ' compacted_as_of = excluded.compacted_as_of',
+            (as_of.isoformat(),) + params
+        )
+        conn.execute(
+            f'INSERT INTO loans_archive SELECT *, ? FROM loans WHERE {COMPACTABLE}',
+            (as_of.isoformat(),) + params
+        )
+        archived = conn.execute(f'DELETE FROM loans WHERE {COMPACTABLE}', params).rowcount
+    conn.close()
+    return archived
+
+
+@task('summarize_compaction')
+def summarize_compaction(ctx, results):
+    return {'archived_loans': sum(results), 'jobs': len(results)}
+
+
+# Bulk re-score ---------------------------------------------------------------------
+
+@task('rescore')
+def rescore(ctx, db_path, customers_per_job=CUSTOMERS_PER_JOB):
+    """
+    Score every customer from the feature table (at its as-of date)
+    """
+    conn = connect(db_path)
+    ranges = id_ranges(conn, 'SELECT customer_id FROM customers ORDER BY customer_id',
+                       customers_per_job)
+    conn.close()
+    return ctx.fan_out(
+        [rescore_range.s(db_path, first, last) for first, last in ranges],
+        callback=summarize_scores.s(db_path),
+    )
+
+
+@task('rescore_range')
+def rescore_range(ctx, db_path, first, last):
+    table = FeatureTable(db_path)
+    as_of = to_date(table.as_of).isoformat()
+    conn = connect(db_path)
+    customers = conn.execute(
+        'SELECT customer_id, approved_limit FROM customers WHERE customer_id BETWEEN ? AND ?',
+        (first, last)
+    ).fetchall()
+
+    tiers = {}
+    rows = []
+    for number, (customer_id, approved_limit) in enumerate(customers, start=1):
+        breakdown = score_breakdown(table.get(customer_id), approved_limit)
+        tier = approval_tier(breakdown.credit_score)
+        tiers[tier] = tiers.get(tier, 0) + 1
+        rows.append((customer_id, as_of, breakdown.credit_score, tier) + breakdown[1:])
+        if number % 50 == 0:
+            ctx.progress(number, len(customers))
+
+    with conn:
+        conn.executemany('INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+    conn.close()
+    ctx.progress(len(customers), len(customers))
+    return tiers
+
+
+@task('summarize_scores')
+def summarize_scores(ctx, results, db_path=None):
+    """
+    Tier totals; marks the scores table as changed once every range is in
+    """
+    if db_path is not None:
+        conn = connect(db_path)
+        with conn:
+            bump_data_version(conn, SCORES_VERSION)
+        conn.close()
+    totals = {}
+    for tiers in results:
+        for tier, count in tiers.items():
+            totals[tier] = totals.get(tier, 0) + count
+    return totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run ingestion, rebuild and re-score jobs')
+    parser.add_argument('--db', default='credit.db')
+    parser.add_argument('--broker', default=':memory:', help="SQLite broker path (':memory:' = in-process)")
+    parser.add_argument('--customers', default='customer_data.xlsx')
+    parser.add_argument('--loans', default='loan_data.xlsx')
+    parser.add_argument('--as-of', help='scoring date (default: today)')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument('--loan-book', help='publish the shared loan book to this directory')
+    parser.add_argument('--compact', action='store_true',
+                        help='compact closed pre-current-year loans before re-scoring')
+    args = parser.parse_args(argv)
+
+    clock = FixedClock(args.as_of) if args.as_of else SystemClock()
+    as_of = clock.today().isoformat()
+    broker = SQLiteBroker(args.broker)
+
+    print("BACKGROUND JOBS")
+    print("=" * 50)
+    job = submit(broker, ingest.s(args.db, args.customers, args.loans, as_of, args.chunksize,
+                                    args.loan_book))
+    run_workers(broker, args.workers)
+    group = broker.group_status(broker.status(job)['result'])
+    print(f"Ingestion: {broker.status(group['callback_job'])['result']}")
+
+    if args.compact:
+        job = submit(broker, compact_loans.s(args.db, as_of))
+        run_workers(broker, args.workers)
+        group = broker.group_status(broker.status(job)['result'])
+        print(f"Compaction: {broker.status(group['callback_job'])['result']}")
+
+    job = submit(broker, rescore.s(args.db))
+    run_workers(broker, args.workers)
+    group = broker.group_status(broker.status(job)['result'])
+    print(f"Re-score as of {as_of}: {broker.status(group['callback_job'])['result']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+import random
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest import breakdown_arrays
+from credit_scoring import (
+    LOAN_RECORD_COLUMNS, assignment_breakdown, loan_records_breakdown, loan_records_from_frame,
+    score_breakdown,
+)
+from feature_table import compute_customer_features
+
+AS_OF = '2025-07-21'
+
+# (tenure, EMIs paid on time) of a 16-loan history whose average payment ratio
+# is exactly 0.8; summed sequentially it lands just below, pairwise it does not
+THRESHOLD_HISTORY = [
+    (120, 84), (30, 21), (60, 60), (60, 60), (20, 14), (60, 42), (60, 60), (120, 84),
+    (60, 54), (20, 12), (10, 9), (10, 7), (10, 6), (10, 10), (20, 20), (10, 6),
+]
+
+
+def history_frame(loans, customer_id=1):
+    rows = [
+        (amount, tenure, paid, pd.Timestamp(approved), pd.Timestamp(ended))
+        for amount, tenure, paid, approved, ended in loans
+    ]
+    frame = pd.DataFrame(rows, columns=LOAN_RECORD_COLUMNS)
+    frame['Customer ID'] = customer_id
+    frame['Monthly payment'] = 0  # feature-table input; not part of the score
+    return frame
+
+
+def all_engines(customer, history):
+    """
+    ScoreBreakdown from the pandas, scalar, feature-table and vectorized scorers
+    """
+    pandas_path = assignment_breakdown(customer, history, AS_OF)
+    scalar = loan_records_breakdown(customer, loan_records_from_frame(history), AS_OF)
+    features = compute_customer_features(history, AS_OF).iloc[0].to_dict()
+    feature_row = score_breakdown(features, customer['Approved Limit'])
+    vectorized = breakdown_arrays(
+        np.array([features['loan_count']]), np.array([features['payment_ratio_sum']]),
+        np.array([features['current_year_loans']]), np.array([features['active_debt']]),
+        np.array([customer['Approved Limit']]),
+    )
+    return pandas_path, scalar, feature_row, int(vectorized['credit_score'][0])
+
+
+def test_threshold_history_scores_alike():
+    history = history_frame(
+        [(100000, tenure, paid, date(2020, 1, 1), date(2030, 1, 1))
+         for tenure, paid in THRESHOLD_HISTORY]
+    )
+    customer = {'Approved Limit': 10**8}
+    pandas_path, scalar, feature_row, vectorized = all_engines(customer, history)
+    assert pandas_path.payment == 60  # average ratio 0.8 exactly
+    assert pandas_path == scalar == feature_row
+    assert vectorized == scalar.credit_score
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_long_histories_score_alike(seed):
+    rng = random.Random(seed)
+    for _ in range(150):
+        loans = []
+        for _ in range(rng.randint(8, 40)):
+            tenure = rng.choice([10, 12, 20, 24, 30, 36, 60, 120])
+            approved = date(rng.randint(2015, 2025), rng.randint(1, 12), 1)
+            ended = date(approved.year + tenure // 12 + 1, approved.month, 1)
+            paid = int(tenure * rng.choice([0.6, 0.7, 0.8, 0.9, 1.0]))
+            loans.append((rng.randint(1, 20) * 100000, tenure, paid, approved, ended))
+        customer = {'Approved Limit': rng.randint(10, 400) * 100000}
+        pandas_path, scalar, feature_row, vectorized = all_engines(customer, history_frame(loans))
+        assert pandas_path == scalar == feature_row
+        assert vectorized == scalar.credit_score
+
+
+def test_loan_past_the_approved_limit_is_rejected():
+    from credit_scoring import LIMIT_WOULD_EXCEED_MESSAGE, check_eligibility_from_features
+
+    customer = {'Monthly Salary': 200000, 'Approved Limit': 1000000}
+    features = {'loan_count': 1, 'payment_ratio_sum': 1.0, 'current_year_loans': 0,
+                'active_debt': 800000, 'active_emi_sum': 0}
+    within = check_eligibility_from_features(1, customer, features, 200000, 10.5, 12)
+    beyond = check_eligibility_from_features(1, customer, features, 200001, 10.5, 12)
+    assert within['approval']
+    assert not beyond['approval']
+    assert beyond['message'] == LIMIT_WOULD_EXCEED_MESSAGE
+
+
+def test_explanation_names_the_emi_cap():
+    from credit_scoring import check_eligibility_from_features
+
+    customer = {'Monthly Salary': 50000, 'Approved Limit': 5000000}
+    features = {'loan_count': 1, 'payment_ratio_sum': 1.0, 'current_year_loans': 0,
+                'active_debt': 0, 'active_emi_sum': 20000}
+    result = check_eligibility_from_features(1, customer, features, 500000, 10.5, 12)
+    assert not result['approval']
+    assert result['explanation']['credit_score'] > 50  # the score alone would approve
+    assert result['explanation']['rejection_reason'] == result['message']
+    assert 'exceed 50% of monthly income' in result['message']
@@ -0,0 +1,31 @@
+import random
+
+import pandas as pd
+import pytest
+
+from bench_emi import GRID_RATES, GRID_TENURES, reference_emi
+from credit_scoring import calculate_emi
+
+
+def test_rate_tenure_grid_matches_original_formula():
+    # Every (rate, tenure) pair of the grid, each with its own principal
+    rng = random.Random(7)
+    mismatches = [
+        (principal, rate, tenure)
+        for rate in GRID_RATES for tenure in GRID_TENURES
+        for principal in [rng.randrange(10_000, 10_000_000)]
+        if calculate_emi(principal, rate, tenure) != reference_emi(principal, rate, tenure)
+    ]
+    assert mismatches == []
+
+
+def test_loan_book_matches_original_formula():
+    loans = pd.read_excel('loan_data.xlsx')
+    for principal, rate, tenure in zip(loans['Loan Amount'], loans['Interest Rate'], loans['Tenure']):
+        assert calculate_emi(principal, rate, tenure) == reference_emi(principal, rate, tenure)
+
+
+def test_zero_rate_and_invalid_tenure():
+    assert calculate_emi(120_000, 0, 12) == 10_000
+    with pytest.raises(ValueError):
+        calculate_emi(120_000, 10.5, 0)
@@ -0,0 +1,190 @@
+import sqlite3
+
+import pytest
+
+from jobs import SQLiteBroker, Task, Worker, run_workers, submit
+
+
+def make_registry(*tasks):
+    return {t.name: t for t in tasks}
+
+
+@pytest.fixture
+def broker(tmp_path):
+    return SQLiteBroker(str(tmp_path / 'broker.db'))
+
+
+def test_retry_after_failure(broker):
+    calls = []
+
+    def flaky(ctx, value):
+        calls.append(ctx.attempt)
+        if ctx.attempt == 1:
+            raise RuntimeError('transient')
+        return value * 2
+
+    registry = make_registry(Task('flaky', flaky, max_retries=2, retry_delay=0.01))
+    job = submit(broker, ('flaky', [21]))
+    run_workers(broker, 2, registry)
+
+    status = broker.status(job)
+    assert status['status'] == 'done'
+    assert status['result'] == 42
+    assert status['attempts'] == 2
+    assert 'transient' in status['error']
+    assert calls == [1, 2]
+
+
+def test_retries_exhausted(broker):
+    def broken(ctx):
+        raise RuntimeError('permanent')
+
+    registry = make_registry(Task('broken', broken, max_retries=1, retry_delay=0.01))
+    job = submit(broker, ('broken', []))
+    run_workers(broker, 1, registry)
+
+    status = broker.status(job)
+    assert status['status'] == 'failed'
+    assert status['attempts'] == 2
+
+
+def test_group_callback_receives_results_in_order(broker):
+    def square(ctx, value):
+        return value * value
+
+    def total(ctx, results, label):
+        return {label: results}
+
+    def fan(ctx, values):
+        return ctx.fan_out([('square', [v]) for v in values], callback=('total', ['squares']))
+
+    registry = make_registry(Task('square', square, 0, 0), Task('total', total, 0, 0),
+                             Task('fan', fan, 0, 0))
+    job = submit(broker, ('fan', [[3, 1, 2]]))
+    run_workers(broker, 3, registry)
+
+    group = broker.group_status(broker.status(job)['result'])
+    assert group['status'] == 'done'
+    assert group['pending'] == 0
+    assert broker.status(group['callback_job'])['result'] == {'squares': [9, 1, 4]}
+
+
+def test_failed_child_fails_group_without_callback(broker):
+    def child(ctx, value):
+        if value < 0:
+            raise ValueError(value)
+        return value
+
+    registry = make_registry(Task('child', child, 0, 0), Task('callback', lambda ctx, r: r, 0, 0))
+    group_id = broker.enqueue_group([('child', [1]), ('child', [-1])], callback=('callback', []))
+    run_workers(broker, 2, registry)
+
+    group = broker.group_status(group_id)
+    assert group['status'] == 'failed'
+    assert group['callback_job'] is None
+
+
+def test_progress_reported(broker):
+    def chunked(ctx, chunks):
+        for number in range(1, chunks + 1):
+            ctx.progress(number, chunks, f'chunk {number}')
+        return chunks
+
+    registry = make_registry(Task('chunked', chunked, 0, 0))
+    job = submit(broker, ('chunked', [3]))
+    run_workers(broker, 1, registry)
+
+    assert broker.status(job)['progress'] == {'done': 3, 'total': 3, 'message': 'chunk 3'}
+
+
+def test_unserializable_result_fails_job(broker):
+    registry = make_registry(Task('set_result', lambda ctx: {1, 2}, max_retries=0, retry_delay=0))
+    job = submit(broker, ('set_result', []))
+    run_workers(broker, 1, registry)  # returns instead of leaving the job running
+
+    status = broker.status(job)
+    assert status['status'] == 'failed'
+    assert 'not JSON serializable' in status['error']
+    assert broker.outstanding() == 0
+
+
+def test_expired_lease_is_reclaimed(tmp_path):
+    broker = SQLiteBroker(str(tmp_path / 'broker.db'), lease=0)
+    job = submit(broker, ('echo', ['hello']))
+    job_id, _, _, attempt = broker.claim()  # a worker that dies mid-job
+    assert (job_id, attempt) == (job, 1)
+
+    registry = make_registry(Task('echo', lambda ctx, value: value, 0, 0))
+    Worker(broker, registry).run_until_idle()
+    assert broker.status(job)['status'] == 'done'
+    assert broker.status(job)['attempts'] == 2
+
+    # The first attempt finishing late changes nothing
+    broker.complete(job, 'stale', attempt=1)
+    assert broker.status(job)['result'] == 'hello'
+
+
+def write_exports(tmp_path):
+    customers = tmp_path / 'customers.csv'
+    customers.write_text(
+        'Customer ID,First Name,Last Name,Age,Phone Number,Monthly Salary,Approved Limit\n'
+        '1,Ada,Lovelace,36,9000000001,100000,3600000\n'
+        '2,Alan,Turing,41,9000000002,80000,2900000\n'
+    )
+    loans = tmp_path / 'loans.csv'
+    loans.write_text(
+        'Customer ID,Loan ID,Loan Amount,Tenure,Interest Rate,Monthly payment,'
+        'EMIs paid on Time,Date of Approval,End Date\n'
+        '1,10,500000,12,10.5,44073,12,2023-01-10,2024-01-10\n'
+        '2,11,300000,24,12.0,14122,5,2025-02-01,2027-02-01\n'
+        '2,10,900000,36,9.0,28619,3,2025-03-01,2028-03-01\n'
+    )
+    return str(customers), str(loans)
+
+
+def test_ingest_skips_duplicate_loan_ids(tmp_path, broker):
+    from tasks import ingest
+
+    customers, loans = write_exports(tmp_path)
+    db_path = str(tmp_path / 'credit.db')
+
+    job = submit(broker, ingest.s(db_path, customers, loans, '2025-07-21', 2))
+    run_workers(broker, 2)
+
+    group = broker.group_status(broker.status(job)['result'])
+    summary = broker.status(group['callback_job'])['result']
+    assert summary == {'customers': 2, 'loans': 3, 'inserted': 2, 'skipped_duplicates': 1}
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute('SELECT customer_id FROM loans WHERE loan_id = 10').fetchone() == (1,)
+    # after_ingest chained the feature-table rebuild
+    assert conn.execute('SELECT COUNT(*) FROM customer_features').fetchone()[0] == 2
+    conn.close()
+
+
+def test_rebuild_swaps_features_in_at_fan_in(tmp_path, broker):
+    from jobs import REGISTRY
+    from feature_table import FeatureTable
+    from tasks import FEATURES_VERSION, data_version, ingest, rebuild_features
+
+    customers, loans = write_exports(tmp_path)
+    db_path = str(tmp_path / 'credit.db')
+    submit(broker, ingest.s(db_path, customers, loans, '2025-07-21', 2))
+    run_workers(broker, 2)
+    before = FeatureTable(db_path).rows()
+
+    # Ranges built, fan-in not run yet: readers still see the previous build
+    partial = {name: t for name, t in REGISTRY.items() if name != 'finish_feature_rebuild'}
+    submit(broker, rebuild_features.s(db_path, '2029-01-01'))
+    run_workers(broker, 2, partial)
+    table = FeatureTable(db_path)
+    assert table.as_of.date().isoformat() == '2025-07-21'
+    assert table.rows() == before
+
+    submit(broker, rebuild_features.s(db_path, '2029-01-01'))
+    run_workers(broker, 2)
+    table = FeatureTable(db_path)
+    assert table.as_of.date().isoformat() == '2029-01-01'
+    assert table.get(2)['active_debt'] == 0  # both loans ended by then
+    # one bump per swap (after_ingest's rebuild, then this one), none for the partial run
+    assert data_version(table.conn, FEATURES_VERSION) == 2